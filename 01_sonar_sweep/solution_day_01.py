@@ -1,23 +1,36 @@
 """https://adventofcode.com/2021/day/1"""
 
-from typing import List
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Union
 
+# array type codes of unsigned integers by their size in bytes
+UNSIGNED_TYPES = {array(code).itemsize: code for code in "HILQ"}
 
-def get_input(file: str = "input.txt") -> List[int]:
-    lines = []
+
+def _popcount(number: int) -> int:
+    return bin(number).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)  # int.bit_count in python 3.10+
+
+
+def iter_depths(file: str = "input.txt") -> Iterator[int]:
     with open(file, "r", encoding="utf-8") as fh:
         for line in fh:
             line = line.strip()
             if line:
-                lines.append(int(line))
+                yield int(line)
 
-    return lines
+
+def get_input(file: str = "input.txt") -> List[int]:
+    return list(iter_depths(file))
 
 
 def count_increases(depths: List[int], window: int = 1) -> int:
     last = sum(depths[:window])
     count = 0
-    idx = window
+    idx = 1
     while idx < len(depths) - window + 1:
         current = sum(depths[idx : idx + window])
         if current > last:
@@ -28,6 +41,76 @@ def count_increases(depths: List[int], window: int = 1) -> int:
     return count
 
 
+def count_increases_streaming(
+    depths: Union[str, Iterable[int]], window: int = 1
+) -> int:
+    """Count increases of sliding window sums in O(n) time and O(window) memory.
+
+    Two adjacent windows share all values but the entering and the leaving one,
+    so only those two are compared. Last `window` values are kept in a ring
+    buffer. `depths` can also be a path to the file, read line by line.
+    """
+    if window < 1:
+        raise ValueError(f"Window must be positive: {window}")
+    if isinstance(depths, str):
+        depths = iter_depths(depths)
+
+    ring = [0] * window
+    count = 0
+    for idx, depth in enumerate(depths):
+        position = idx % window
+        if idx >= window and depth > ring[position]:
+            count += 1
+        ring[position] = depth
+
+    return count
+
+
+class DepthSeries:
+    """Depths loaded once for counting increases over many window sizes.
+
+    Window sum grows exactly when `depths[i + window] > depths[i]`. All depths
+    are packed into one big integer, each into a fixed-width field with its
+    highest (guard) bit set. Subtracting the same integer shifted by `window`
+    fields compares all pairs at once; the guard bit of a field survives only
+    where `depths[i] >= depths[i + window]`, so one popcount gives the answer.
+    """
+
+    def __init__(self, depths: Iterable[int]) -> None:
+        values = array("q", depths)
+        self.length = len(values)
+        low = min(values, default=0)
+        span = max(values, default=0) - low
+
+        for size, code in sorted(UNSIGNED_TYPES.items()):
+            if span < 1 << (8 * size - 1):
+                break
+        else:
+            raise ValueError(f"Depths span too large: {span}")
+
+        if low:
+            values = array("q", (value - low for value in values))
+        packed = array(code, values).tobytes()
+        self.field_bits = 8 * size
+        self.packed = int.from_bytes(packed, sys.byteorder)
+        guard = (1 << (self.field_bits - 1)).to_bytes(size, sys.byteorder)
+        self.guards = int.from_bytes(guard * self.length, sys.byteorder)
+        self.guarded = self.packed | self.guards
+
+    def count_increases(self, window: int = 1) -> int:
+        if window < 1:
+            raise ValueError(f"Window must be positive: {window}")
+        if window >= self.length:
+            return 0
+        shifted = self.packed >> (window * self.field_bits)
+        not_increased = popcount((self.guarded - shifted) & self.guards)
+        # guards of the last `window` fields are never cleared
+        return self.length - not_increased
+
+    def count_increases_batch(self, windows: Iterable[int]) -> Dict[int, int]:
+        return {window: self.count_increases(window) for window in windows}
+
+
 if __name__ == "__main__":
     depths = get_input("input.txt")
     for idx, window in enumerate([1, 3]):
@@ -1,7 +1,18 @@
 """https://adventofcode.com/2021/day/2"""
 
+import itertools
+import operator
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+DIRECTION_CODES = {"forward": 0, "down": 1, "up": 2}
+# direction code -> 1 for horizontal moves, 0 otherwise
+FORWARD_TABLE = bytes([1, 0, 0]).ljust(256, b"\x00")
+# direction code -> change of depth (or aim) per step, as signed bytes
+VERTICAL_TABLE = array("b", [0, 1, -1]).tobytes().ljust(256, b"\x00")
 
 
 @dataclass
@@ -58,6 +69,187 @@ def load_moves(file: str = "input.txt") -> List[Move]:
     return moves
 
 
+@dataclass
+class MoveColumns:
+    """Moves stored column-wise, direction codes and steps in compact arrays."""
+
+    directions: array
+    steps: array
+
+    def __len__(self) -> int:
+        return len(self.directions)
+
+
+def load_move_columns(
+    file: str = "input.txt", start: int = 0, end: Optional[int] = None
+) -> MoveColumns:
+    """Load moves from the file, or only from its byte range [start, end).
+
+    Lines belong to the range where they start, so consecutive ranges split
+    the file into consecutive moves.
+    """
+    directions = array("B")
+    steps = array("q")
+    with open(file, "rb") as fh:
+        if start > 0:
+            fh.seek(start - 1)
+            fh.readline()  # skip line started in previous range
+        position = fh.tell()
+        for line in fh:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            if line.strip():
+                direction, step = line.split()
+                code = DIRECTION_CODES.get(direction.decode())
+                if code is None:
+                    raise ValueError(f"Unknown direction: {direction.decode()}")
+                directions.append(code)
+                steps.append(int(step))
+
+    return MoveColumns(directions, steps)
+
+
+def _int_column(make_values: Callable[[], Iterable[int]]) -> Sequence[int]:
+    """Store values in compact array, unless they overflow 64 bits."""
+    try:
+        return array("q", make_values())
+    except OverflowError:
+        return list(make_values())
+
+
+def _direction_factors(moves: MoveColumns) -> Tuple[bytes, array]:
+    """Return per-move factors of steps for horizontal and vertical change."""
+    codes = moves.directions.tobytes()
+    vertical = array("b")
+    vertical.frombytes(codes.translate(VERTICAL_TABLE))
+
+    return codes.translate(FORWARD_TABLE), vertical
+
+
+@dataclass(frozen=True)
+class MoveSegment:
+    """Summary of consecutive moves, as if they started at zero position and aim.
+
+    Every move is an affine update of (horizontal, aim, aimed depth), so
+    segments can be summarized independently and then composed in order.
+    Aim plays also the role of depth of the plain `Position`.
+    """
+
+    horizontal: int = 0
+    aim: int = 0
+    depth: int = 0
+
+    def then(self, other: "MoveSegment") -> "MoveSegment":
+        """Return summary of this segment followed by the other one."""
+        return MoveSegment(
+            self.horizontal + other.horizontal,
+            self.aim + other.aim,
+            self.depth + other.depth + self.aim * other.horizontal,
+        )
+
+    def position(self) -> Position:
+        return Position(self.horizontal, self.aim)
+
+    def aimed_position(self) -> AimedPosition:
+        return AimedPosition(self.horizontal, self.depth, self.aim)
+
+
+def summarize_moves(moves: MoveColumns) -> MoveSegment:
+    """Compute segment summary from sums over the columns."""
+    forward, vertical = _direction_factors(moves)
+    steps = moves.steps
+
+    horizontal = sum(map(operator.mul, steps, forward))
+    aim = sum(map(operator.mul, steps, vertical))
+    aims = itertools.accumulate(map(operator.mul, steps, vertical))
+    depth = sum(map(operator.mul, aims, map(operator.mul, steps, forward)))
+
+    return MoveSegment(horizontal, aim, depth)
+
+
+def final_positions(moves: MoveColumns) -> Tuple[Position, AimedPosition]:
+    """Compute final plain and aimed position from sums over the columns."""
+    segment = summarize_moves(moves)
+    return segment.position(), segment.aimed_position()
+
+
+def summarize_file_range(file: str, start: int, end: int) -> MoveSegment:
+    return summarize_moves(load_move_columns(file, start, end))
+
+
+def split_file(file: str, parts: int) -> List[Tuple[int, int]]:
+    """Split file into given number of byte ranges of about the same size."""
+    size = os.path.getsize(file)
+    bounds = [size * part // parts for part in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def parallel_final_positions(
+    file: str = "input.txt", workers: Optional[int] = None, chunks: int = 0
+) -> Tuple[Position, AimedPosition]:
+    """Compute final positions, summarizing byte ranges of the file in parallel.
+
+    By default the file is split into four chunks per worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_file(file, chunks or 4 * workers)
+
+    segment = MoveSegment()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        starts, ends = zip(*ranges)
+        summaries = executor.map(
+            summarize_file_range, itertools.repeat(file), starts, ends
+        )
+        for summary in summaries:
+            segment = segment.then(summary)
+
+    return segment.position(), segment.aimed_position()
+
+
+class MoveIndex:
+    """Prefix sums of the move log answering position after any move in O(1).
+
+    Both kinds of position are cumulative sums of per-move changes. Depth of
+    `Position` is the same number as aim of `AimedPosition`, and depth of
+    `AimedPosition` grows by aim times steps of each forward move.
+    Index `k` means position after first `k` moves, so it goes up to `len`.
+    """
+
+    def __init__(self, moves: MoveColumns) -> None:
+        forward, vertical = _direction_factors(moves)
+        steps = moves.steps
+
+        horizontal_deltas = _int_column(lambda: map(operator.mul, steps, forward))
+        self.horizontal = _int_column(
+            lambda: itertools.accumulate(horizontal_deltas, initial=0)
+        )
+        self.aim = _int_column(
+            lambda: itertools.accumulate(map(operator.mul, steps, vertical), initial=0)
+        )
+        # aim is not changed by forward moves, so aim after the move can be used
+        aims = self.aim
+        self.aimed_depth = _int_column(
+            lambda: itertools.accumulate(
+                map(operator.mul, itertools.islice(aims, 1, None), horizontal_deltas),
+                initial=0,
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.horizontal) - 1
+
+    def position(self, moves_made: int = -1) -> Position:
+        return Position(self.horizontal[moves_made], self.aim[moves_made])
+
+    def aimed_position(self, moves_made: int = -1) -> AimedPosition:
+        return AimedPosition(
+            self.horizontal[moves_made],
+            self.aimed_depth[moves_made],
+            self.aim[moves_made],
+        )
+
+
 if __name__ == "__main__":
     moves = load_moves("input.txt")
     for idx, position in enumerate([Position(), AimedPosition()]):
@@ -1,6 +1,7 @@
 """https://adventofcode.com/2021/day/3"""
 
-from typing import Callable, List
+import bisect
+from typing import Callable, List, Optional, Type
 
 TCountFunc = Callable[[int], str]
 
@@ -38,40 +39,100 @@ class BitCounter:
         )
 
 
+class PackedBitCounter(BitCounter):
+    """Bit counter counting whole columns at once.
+
+    Numbers are joined into a single row-major bytes matrix, so every column
+    is a strided slice of it, counted by `bytes.count` without Python loops.
+    """
+
+    def add_numbers(self, numbers: List[str]) -> None:
+        if not numbers:
+            return
+        width = len(self.counter)
+        if set(map(len, numbers)) != {width}:
+            wrong = next(number for number in numbers if len(number) != width)
+            raise ValueError(f"Incorrect format: {wrong}")
+
+        matrix = "".join(numbers).encode("ascii", errors="replace")
+        invalid = matrix.translate(None, b"01")
+        if invalid:
+            wrong = numbers[matrix.find(invalid[:1]) // width]
+            raise ValueError(f"Incorrect format: {wrong}")
+
+        for idx in range(width):
+            ones = matrix[idx::width].count(b"1")
+            self.counter[idx] += 2 * ones - len(numbers)
+
+
+class RatingIndex:
+    """Report numbers sorted once, for finding ratings in O(width * log(n)).
+
+    Numbers sharing their first bits form a contiguous range of the sorted
+    list, so counting and filtering by the next bit is a single bisect that
+    splits the range into the part with 0 and the part with 1.
+    """
+
+    def __init__(self, lines: List[str]) -> None:
+        self.width = len(lines[0])
+        self.numbers = sorted(int(line, 2) for line in lines)
+
+    def rating(self, most_common: bool) -> int:
+        """Find number by repeatedly keeping most (least) common bit.
+
+        On equal counts 1 (0) is kept. If all numbers left have the same bit,
+        they are kept whatever the criterion is.
+        """
+        low, high = 0, len(self.numbers)
+        prefix = 0
+        for index in range(self.width):
+            if high - low <= 1:
+                break
+            bit = 1 << (self.width - 1 - index)
+            split = bisect.bisect_left(self.numbers, prefix | bit, low, high)
+            zeros = split - low
+            ones = high - split
+            if not ones or not zeros:
+                keep_ones = ones > 0
+            elif most_common:
+                keep_ones = ones >= zeros
+            else:
+                keep_ones = ones < zeros
+
+            if keep_ones:
+                low = split
+                prefix |= bit
+            else:
+                high = split
+
+        return self.numbers[low]
+
+
 class ReportAnalyzer:
+    counter_type: Type[BitCounter] = PackedBitCounter
+
     def __init__(self, lines: List[str]) -> None:
         if not lines:
             raise ValueError("No lines to analyze")
         self.lines = lines
         self.width = len(lines[0])
-        self.counter = BitCounter(self.width)
+        self.counter = self.counter_type(self.width)
         self._counted = False
+        self._index: Optional[RatingIndex] = None
 
     def _count(self) -> None:
         self.counter.add_numbers(self.lines)
         self._counted = True
 
     def _get_rating(self, type_: str) -> int:
-        if not self._counted:
-            self._count()
-
-        lines = self.lines
-        index = 0
-        while index < self.width and len(lines) > 1:
-            counter = BitCounter(self.width)
-            counter.add_numbers(lines)
-
-            if type_ == "oxy_gen":
-                bit = counter.most_common()[index]
-            elif type_ == "co2_scrubber":
-                bit = counter.least_common()[index]
-            else:
-                raise ValueError(f"Unknown rating type: {type_}")
-
-            lines = [line for line in lines if line[index] == bit]
-            index += 1
-
-        return int(lines[0], 2)
+        if self._index is None:
+            self._index = RatingIndex(self.lines)
+
+        if type_ == "oxy_gen":
+            return self._index.rating(most_common=True)
+        if type_ == "co2_scrubber":
+            return self._index.rating(most_common=False)
+        raise ValueError(f"Unknown rating type: {type_}")
 
     def gama_rate(self) -> int:
         if not self._counted:
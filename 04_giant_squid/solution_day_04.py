@@ -1,5 +1,7 @@
 """https://adventofcode.com/2021/day/4"""
 
+from collections import defaultdict
+from dataclasses import dataclass
 from typing import List, Dict, Tuple
 
 TGame = List["Board"]
@@ -10,6 +12,11 @@ class Board:
         self.board: Dict[int, Tuple[int, int]] = {}
         self.state: List[List[bool]] = []
         self.last_number: int = -1
+        # counts of marked numbers in each row and column, updated on marking
+        self.row_hits: List[int] = []
+        self.col_hits: List[int] = []
+        self.unmarked_sum: int = 0
+        self.won: bool = False
         self._init(board)
 
     def _init(self, board: List[List[int]]) -> None:
@@ -22,6 +29,10 @@ class Board:
 
             self.state.append(row_state)
 
+        self.row_hits = [0] * len(self.state)
+        self.col_hits = [0] * len(self.state[0])
+        self.unmarked_sum = sum(self.board)
+
     def is_row_filled(self) -> bool:
         for row in self.state:
             if all(row):
@@ -36,22 +47,26 @@ class Board:
         return False
 
     def is_won(self) -> bool:
-        return self.is_row_filled() or self.is_col_filled()
+        return self.won
 
     def add_number(self, num: int) -> None:
         coordinates = self.board.get(num)
         if coordinates is not None:
             row, col = coordinates
-            self.state[row][col] = True
+            if not self.state[row][col]:
+                self.state[row][col] = True
+                self.unmarked_sum -= num
+                self.row_hits[row] += 1
+                self.col_hits[col] += 1
+                if (
+                    self.row_hits[row] == len(self.col_hits)
+                    or self.col_hits[col] == len(self.row_hits)
+                ):
+                    self.won = True
         self.last_number = num
 
     def score(self) -> int:
-        total = 0
-        for num, (row, col) in self.board.items():
-            if not self.state[row][col]:
-                total += num
-
-        return total * self.last_number
+        return self.unmarked_sum * self.last_number
 
 
 def parse_input(file: str = "input.txt") -> Tuple[List[int], TGame]:
@@ -71,16 +86,30 @@ def parse_input(file: str = "input.txt") -> Tuple[List[int], TGame]:
     return numbers, boards
 
 
+def index_boards(boards: TGame) -> Dict[int, List[int]]:
+    """Map each number to indexes of all boards containing it."""
+    index: Dict[int, List[int]] = defaultdict(list)
+    for idx, board in enumerate(boards):
+        for num in board.board:
+            index[num].append(idx)
+
+    return index
+
+
 def play(numbers: List[int], boards: TGame, order: int) -> int:
     state = [False for _ in boards]
     if order < 0:
         order = len(boards) + order + 1
     won = 0
+    index = index_boards(boards)
 
-    for number in numbers:
-        for idx, board in enumerate(boards):
+    for turn, number in enumerate(numbers):
+        # boards can be already marked by previous game, so check all at first
+        candidates = index.get(number, []) if turn else range(len(boards))
+        for idx in candidates:
             if state[idx]:  # game already won
                 continue
+            board = boards[idx]
             board.add_number(number)
             if not board.is_won():
                 continue
@@ -91,6 +120,55 @@ def play(numbers: List[int], boards: TGame, order: int) -> int:
     return -1
 
 
+@dataclass
+class Win:
+    board: int  # index of the board
+    turn: int  # index of the winning number
+    number: int
+    score: int
+
+
+def rank_boards(numbers: List[int], boards: TGame) -> List[Win]:
+    """Return wins of all boards in the order they happen, without playing.
+
+    Row (column) is filled at the latest turn of its numbers and board wins
+    at the earliest of these. Boards that never win are left out.
+    Boards are not modified.
+    """
+    turns: Dict[int, int] = {}
+    for turn, number in enumerate(numbers):
+        turns.setdefault(number, turn)
+    never = len(numbers)
+
+    wins = []
+    for idx, board in enumerate(boards):
+        grid = [[never] * len(row) for row in board.state]
+        for num, (row, col) in board.board.items():
+            grid[row][col] = turns.get(num, never)
+
+        filled = [max(row) for row in grid] + [max(col) for col in zip(*grid)]
+        win_turn = min(filled)
+        if win_turn == never:
+            continue
+
+        unmarked = sum(num for num in board.board if turns.get(num, never) > win_turn)
+        number = numbers[win_turn]
+        wins.append(Win(idx, win_turn, number, unmarked * number))
+
+    wins.sort(key=lambda win: (win.turn, win.board))
+    return wins
+
+
+def ranked_score(wins: List[Win], board_count: int, order: int) -> int:
+    """Score of board winning as `order`-th, same as `play` but from ranking."""
+    if order < 0:
+        order = board_count + order + 1
+    if not 1 <= order <= len(wins):
+        return -1
+
+    return wins[order - 1].score
+
+
 if __name__ == "__main__":
     game_numbers, game_boards = parse_input("input.txt")
     for idx, win_order in enumerate([1, -1]):
@@ -1,9 +1,33 @@
 """https://adventofcode.com/2021/day/5"""
 
+import bisect
+import math
+import os
 import re
+import tempfile
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Iterator
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+# cells of the largest grid allocated by `DenseOceanFloor` (1 byte per cell)
+MAX_DENSE_CELLS = 2 * 10**8
+# adds one to each byte, saturating at 255
+INCREMENT = bytes(range(1, 256)) + b"\xff"
+# lines read or written at once by the tiled counting
+LINES_PER_BLOCK = 2**12
+# memory taken by the tiled counting for each part of a line in a strip of
+# tiles: its coordinates, its place in the sweep order and in active parts
+PART_BYTES = 64
+
+# families of parallel lines, each line of a family is identified by key
+# `a * x + b * y`, where (a, b) are coefficients of the family
+HORIZONTAL, VERTICAL, DIAGONAL_DOWN, DIAGONAL_UP = range(4)
+FAMILY_COEFFICIENTS = [(0, 1), (1, 0), (1, -1), (1, 1)]
+
+TPiece = Tuple[int, int, int, int]  # key, first and last position, vent count
+TCell = Tuple[int, int]
 
 
 @dataclass(frozen=True)
@@ -55,9 +79,247 @@ class OceanFloor:
                 yield vent
 
 
-def parse_input(file: str = "input.txt") -> List[Line]:
+class DenseOceanFloor:
+    """Vent counts in a dense grid of bytes covering given bounding box.
+
+    Every line is a slice of the row-major grid: horizontal ones with step 1,
+    vertical ones with step of grid width and diagonals with width +/- 1.
+    Whole slice is incremented at once by `bytes.translate`.
+    Counts saturate at 255.
+    """
+
+    MAX_COUNT = 255
+
+    def __init__(self, top_left: Point, bottom_right: Point) -> None:
+        self.origin = top_left
+        self.width = bottom_right.x - top_left.x + 1
+        self.height = bottom_right.y - top_left.y + 1
+        self.vents = bytearray(self.width * self.height)
+
+    def _index(self, point: Point) -> int:
+        return (point.y - self.origin.y) * self.width + point.x - self.origin.x
+
+    def add_line(self, line: Line) -> None:
+        start, end = line.start, line.end
+        if (start.y, start.x) > (end.y, end.x):
+            start, end = end, start
+
+        if line.is_horizontal():
+            step = 1
+        elif line.is_vertical():
+            step = self.width
+        elif end.x > start.x:
+            step = self.width + 1
+        else:
+            step = self.width - 1
+
+        cells = slice(self._index(start), self._index(end) + 1, step)
+        self.vents[cells] = self.vents[cells].translate(INCREMENT)
+
+    def count_overlapping(self, low_limit: int = 2) -> int:
+        if low_limit > self.MAX_COUNT:
+            raise ValueError(f"Limit too high for dense floor: {low_limit}")
+        # cells not covered by any vent are never counted
+        low_counts = sum(self.vents.count(count) for count in range(max(low_limit, 1)))
+        return len(self.vents) - low_counts
+
+
+def bounding_box(lines: Iterable[Line]) -> Tuple[Point, Point]:
+    """Return top left and bottom right corner of box containing all lines."""
+    x_min = y_min = math.inf
+    x_max = y_max = -math.inf
+    for line in lines:
+        for point in (line.start, line.end):
+            x_min = min(x_min, point.x)
+            x_max = max(x_max, point.x)
+            y_min = min(y_min, point.y)
+            y_max = max(y_max, point.y)
+    if x_min == math.inf:
+        raise ValueError("No lines to bound")
+
+    return Point(int(x_min), int(y_min)), Point(int(x_max), int(y_max))
+
+
+def clip_line(line: Line, top_left: Point, bottom_right: Point) -> Optional[Line]:
+    """Return part of the line inside given box, None if there is no such part."""
+    x_step = (line.end.x > line.start.x) - (line.end.x < line.start.x)
+    y_step = (line.end.y > line.start.y) - (line.end.y < line.start.y)
+    first = 0
+    last = max(abs(line.end.x - line.start.x), abs(line.end.y - line.start.y))
+
+    # point after t steps is start + t * step, it must stay between low and high
+    for start, step, low, high in [
+        (line.start.x, x_step, top_left.x, bottom_right.x),
+        (line.start.y, y_step, top_left.y, bottom_right.y),
+    ]:
+        if not step:
+            if not low <= start <= high:
+                return None
+            continue
+        bounds = sorted([(low - start) * step, (high - start) * step])
+        first = max(first, bounds[0])
+        last = min(last, bounds[1])
+
+    if first > last:
+        return None
+
+    return Line(
+        Point(line.start.x + first * x_step, line.start.y + first * y_step),
+        Point(line.start.x + last * x_step, line.start.y + last * y_step),
+    )
+
+
+def _family(line: Line) -> int:
+    if line.is_horizontal():
+        return HORIZONTAL
+    if line.is_vertical():
+        return VERTICAL
+    dx = line.end.x - line.start.x
+    dy = line.end.y - line.start.y
+    if abs(dx) != abs(dy):
+        raise ValueError(f"Line is not horizontal, vertical or diagonal: {line}")
+    return DIAGONAL_DOWN if dx == dy else DIAGONAL_UP
+
+
+def _key(family: int, x: int, y: int) -> int:
+    a, b = FAMILY_COEFFICIENTS[family]
+    return a * x + b * y
+
+
+def _position(family: int, x: int, y: int) -> int:
+    """Position of a cell along the line, y for vertical lines, x otherwise."""
+    return y if family == VERTICAL else x
+
+
+def _cell(family: int, key: int, position: int) -> TCell:
+    if family == HORIZONTAL:
+        return position, key
+    if family == VERTICAL:
+        return key, position
+    if family == DIAGONAL_DOWN:
+        return position, position - key
+    return position, key - position
+
+
+def _crossing(family_1: int, key_1: int, family_2: int, key_2: int) -> Optional[TCell]:
+    """Return cell lying on both lines, if there is one."""
+    a_1, b_1 = FAMILY_COEFFICIENTS[family_1]
+    a_2, b_2 = FAMILY_COEFFICIENTS[family_2]
+    det = a_1 * b_2 - a_2 * b_1
+    x, x_rest = divmod(key_1 * b_2 - key_2 * b_1, det)
+    y, y_rest = divmod(a_1 * key_2 - a_2 * key_1, det)
+    if x_rest or y_rest:  # diagonals crossing between cells
+        return None
+    return x, y
+
+
+def _coverage_pieces(lines: List[Line], family: int) -> List[TPiece]:
+    """Split lines of one family into disjoint pieces with constant vent count."""
+    events: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for line in lines:
+        key = _key(family, line.start.x, line.start.y)
+        first = _position(family, line.start.x, line.start.y)
+        last = _position(family, line.end.x, line.end.y)
+        first, last = min(first, last), max(first, last)
+        events[key] += [(first, 1), (last + 1, -1)]
+
+    pieces = []
+    for key, key_events in events.items():
+        key_events.sort()
+        count = 0
+        for (position, change), (next_position, _) in zip(key_events, key_events[1:]):
+            count += change
+            if count and next_position > position:
+                pieces.append((key, position, next_position - 1, count))
+
+    return pieces
+
+
+def _key_range(piece: TPiece, family: int, other_family: int) -> Tuple[int, int]:
+    """Range of keys of other family lines crossing the piece."""
+    key, first, last, _ = piece
+    keys = [_key(other_family, *_cell(family, key, p)) for p in (first, last)]
+    return min(keys), max(keys)
+
+
+def _find_crossings(
+    family_1: int, pieces_1: List[TPiece], family_2: int, pieces_2: List[TPiece]
+) -> Iterator[Tuple[TCell, int, int]]:
+    """Yield cells where pieces of two families cross, with both vent counts.
+
+    Sweep over keys of the first family; pieces of the second family are
+    active while their range of first family keys contains the sweep key,
+    kept sorted by their own key to find those crossing a piece by bisect.
+    """
+    events = []
+    for idx, piece in enumerate(pieces_2):
+        low, high = _key_range(piece, family_2, family_1)
+        events += [(low, 0, idx), (high, 2, idx)]
+    for idx, piece in enumerate(pieces_1):
+        events.append((piece[0], 1, idx))
+    events.sort()
+
+    active: List[Tuple[int, int]] = []
+    for _, kind, idx in events:
+        if kind == 0:
+            bisect.insort(active, (pieces_2[idx][0], idx))
+        elif kind == 2:
+            del active[bisect.bisect_left(active, (pieces_2[idx][0], idx))]
+        else:
+            piece = pieces_1[idx]
+            low, high = _key_range(piece, family_1, family_2)
+            position = bisect.bisect_left(active, (low, -1))
+            while position < len(active) and active[position][0] <= high:
+                other_key, other_idx = active[position]
+                position += 1
+                cell = _crossing(family_1, piece[0], family_2, other_key)
+                if cell is not None:
+                    yield cell, piece[3], pieces_2[other_idx][3]
+
+
+def get_vent_count_sweep(
+    lines: List[Line], low_limit: int = 2, skip_diagonals: bool = True
+) -> int:
+    """Same as `get_vent_count`, but without visiting the covered cells.
+
+    Overlaps of parallel lines are counted on each line separately by sweeping
+    over line ends. Cells where lines of different families cross are found by
+    sweeping over pairs of families and corrected afterwards.
+    Time depends on number of lines and crossings, not on the covered area.
+    """
+    by_family: List[List[Line]] = [[], [], [], []]
+    for line in lines:
+        family = _family(line)
+        if skip_diagonals and family in (DIAGONAL_DOWN, DIAGONAL_UP):
+            continue
+        by_family[family].append(line)
+    pieces = [_coverage_pieces(group, family) for family, group in enumerate(by_family)]
+
+    count = 0
+    for family_pieces in pieces:
+        for _, first, last, vents in family_pieces:
+            if vents >= low_limit:
+                count += last - first + 1
+
+    crossings: Dict[TCell, Dict[int, int]] = defaultdict(dict)
+    for family_1 in range(4):
+        for family_2 in range(family_1 + 1, 4):
+            for cell, vents_1, vents_2 in _find_crossings(
+                family_1, pieces[family_1], family_2, pieces[family_2]
+            ):
+                crossings[cell][family_1] = vents_1
+                crossings[cell][family_2] = vents_2
+
+    for family_vents in crossings.values():
+        count -= sum(vents >= low_limit for vents in family_vents.values())
+        count += sum(family_vents.values()) >= low_limit
+
+    return count
+
+
+def iter_lines(file: str = "input.txt") -> Iterator[Line]:
+    """Read lines one by one, without keeping them all in memory."""
     pattern = re.compile(r"(\d+),(\d+) -> (\d+),(\d+)")
-    lines = []
     with open(file, "r", encoding="utf-8") as fh:
         for line in fh:
             match = pattern.search(line)
@@ -66,18 +328,32 @@ def parse_input(file: str = "input.txt") -> List[Line]:
             coordinates = [int(m) for m in match.groups()]
             start = Point(coordinates[0], coordinates[1])
             end = Point(coordinates[2], coordinates[3])
-            lines.append(Line(start, end))
+            yield Line(start, end)
+
 
-    return lines
+def parse_input(file: str = "input.txt") -> List[Line]:
+    return list(iter_lines(file))
 
 
 def get_vent_count(
     lines: List[Line], low_limit: int = 2, skip_diagonals: bool = True
 ) -> int:
+    if skip_diagonals:
+        lines = [line for line in lines if line.is_vertical() or line.is_horizontal()]
+    if not lines:
+        return 0
+
+    # dense grid is fast, but sparse lines far apart would not fit in memory
+    top_left, bottom_right = bounding_box(lines)
+    cells = (bottom_right.x - top_left.x + 1) * (bottom_right.y - top_left.y + 1)
+    if cells <= MAX_DENSE_CELLS and low_limit <= DenseOceanFloor.MAX_COUNT:
+        dense_floor = DenseOceanFloor(top_left, bottom_right)
+        for line in lines:
+            dense_floor.add_line(line)
+        return dense_floor.count_overlapping(low_limit)
+
     floor = OceanFloor()
     for line in lines:
-        if skip_diagonals and not (line.is_vertical() or line.is_horizontal()):
-            continue
         floor.add_line(line)
 
     count = 0
@@ -87,6 +363,219 @@ def get_vent_count(
     return count
 
 
+def _band_path(directory: str, band: int) -> str:
+    return os.path.join(directory, f"band_{band}.bin")
+
+
+def _flush_bands(directory: str, buffers: Dict[int, array]) -> None:
+    for band, coordinates in buffers.items():
+        with open(_band_path(directory, band), "ab") as fh:
+            coordinates.tofile(fh)
+
+
+def _write_bands(
+    file: str, directory: str, band_size: int, skip_diagonals: bool
+) -> List[str]:
+    """Write parts of lines in each band of rows to its own file.
+
+    Coordinates of the parts are written as 64-bit integers, lines crossing
+    several bands are clipped to each of them. Returns paths of the files,
+    ordered by band.
+    """
+    buffers: Dict[int, array] = defaultdict(lambda: array("q"))
+    bands: Set[int] = set()
+    buffered = 0
+    for line in iter_lines(file):
+        if skip_diagonals and not (line.is_vertical() or line.is_horizontal()):
+            continue
+        x_low, x_high = sorted([line.start.x, line.end.x])
+        y_low, y_high = sorted([line.start.y, line.end.y])
+        for band in range(y_low // band_size, y_high // band_size + 1):
+            part = clip_line(
+                line,
+                Point(x_low, band * band_size),
+                Point(x_high, (band + 1) * band_size - 1),
+            )
+            if part is None:
+                continue
+            buffers[band].extend([part.start.x, part.start.y, part.end.x, part.end.y])
+            buffered += 1
+
+        if buffered >= LINES_PER_BLOCK:
+            _flush_bands(directory, buffers)
+            bands.update(buffers)
+            buffers.clear()
+            buffered = 0
+    _flush_bands(directory, buffers)
+    bands.update(buffers)
+
+    return [_band_path(directory, band) for band in sorted(bands)]
+
+
+def _iter_coordinates(file: str) -> Iterator[Line]:
+    """Read lines written by `_write_bands`, block by block."""
+    with open(file, "rb") as fh:
+        while True:
+            coordinates = array("q")
+            try:
+                coordinates.fromfile(fh, 4 * LINES_PER_BLOCK)
+            except EOFError:
+                pass  # the last block is shorter, it was still read
+            for idx in range(0, len(coordinates), 4):
+                x_1, y_1, x_2, y_2 = coordinates[idx : idx + 4]
+                yield Line(Point(x_1, y_1), Point(x_2, y_2))
+            if len(coordinates) < 4 * LINES_PER_BLOCK:
+                return
+
+
+def _read_parts(
+    file: str, top_left: Point, bottom_right: Point, max_parts: int
+) -> Optional[array]:
+    """Return coordinates of parts of lines inside the box.
+
+    Returns None as soon as there are more than `max_parts` parts.
+    """
+    parts = array("q")  # start x, start y, end x, end y of each part
+    for line in _iter_coordinates(file):
+        part = clip_line(line, top_left, bottom_right)
+        if part is None:
+            continue
+        if len(parts) >= 4 * max_parts:
+            return None
+        parts.extend([part.start.x, part.start.y, part.end.x, part.end.y])
+
+    return parts
+
+
+def _count_strip(
+    file: str,
+    top_left: Point,
+    bottom_right: Point,
+    tile_size: int,
+    low_limit: int,
+    max_parts: int,
+) -> int:
+    """Count overlaps in a strip of tiles, one tile grid in memory at a time.
+
+    Parts of lines inside the strip are kept as arrays of coordinates, ordered
+    by the tile column of their left end, and tiles are swept from left to
+    right keeping only the parts crossing the current tile. A strip with more
+    than `max_parts` parts or tile columns is split into two strips. A strip
+    of a single tile needs no parts, lines are added to the tile as read.
+    """
+    first_column = top_left.x // tile_size
+    columns = bottom_right.x // tile_size - first_column + 1
+    if columns == 1:
+        floor = DenseOceanFloor(top_left, bottom_right)
+        for line in _iter_coordinates(file):
+            part = clip_line(line, top_left, bottom_right)
+            if part is not None:
+                floor.add_line(part)
+        return floor.count_overlapping(low_limit)
+
+    parts = _read_parts(file, top_left, bottom_right, max_parts)
+    if parts is None or columns > max_parts:
+        middle_x = (first_column + columns // 2) * tile_size
+        return sum(
+            _count_strip(file, *box, tile_size, low_limit, max_parts)
+            for box in [
+                (top_left, Point(middle_x - 1, bottom_right.y)),
+                (Point(middle_x, top_left.y), bottom_right),
+            ]
+        )
+
+    def part_line(idx: int) -> Line:
+        x_1, y_1, x_2, y_2 = parts[4 * idx : 4 * idx + 4]
+        return Line(Point(x_1, y_1), Point(x_2, y_2))
+
+    def right_x(idx: int) -> int:
+        return max(parts[4 * idx], parts[4 * idx + 2])
+
+    def column(idx: int) -> int:
+        return min(parts[4 * idx], parts[4 * idx + 2]) // tile_size - first_column
+
+    # counting sort of the parts by tile column of their left end
+    count = len(parts) // 4
+    column_ends = array("q", bytes(8 * (columns + 1)))
+    for idx in range(count):
+        column_ends[column(idx) + 1] += 1
+    for tile_column in range(columns):
+        column_ends[tile_column + 1] += column_ends[tile_column]
+    order = array("q", bytes(8 * count))
+    for idx in range(count):
+        order[column_ends[column(idx)]] = idx
+        column_ends[column(idx)] += 1
+    del column_ends
+
+    vents = 0
+    active = array("q")
+    position = 0
+    tile_column = 0
+    while position < count or active:
+        if not active:  # skip to the tile of the next part
+            tile_column = column(order[position])
+        tile_x = max((first_column + tile_column) * tile_size, top_left.x)
+        tile_last_x = min(tile_x - tile_x % tile_size + tile_size - 1, bottom_right.x)
+        while position < count and column(order[position]) <= tile_column:
+            active.append(order[position])
+            position += 1
+
+        if len(active) >= low_limit:  # else no cell can be covered enough times
+            tile_top_left = Point(tile_x, top_left.y)
+            tile_bottom_right = Point(tile_last_x, bottom_right.y)
+            floor = DenseOceanFloor(tile_top_left, tile_bottom_right)
+            for idx in active:
+                tile_part = clip_line(part_line(idx), tile_top_left, tile_bottom_right)
+                if tile_part is not None:
+                    floor.add_line(tile_part)
+            vents += floor.count_overlapping(low_limit)
+            del floor
+
+        active = array("q", (idx for idx in active if right_x(idx) > tile_last_x))
+        tile_column += 1
+
+    return vents
+
+
+def _count_band(file: str, tile_size: int, low_limit: int, max_parts: int) -> int:
+    """Count overlaps in a band file written by `_write_bands`."""
+    top_left, bottom_right = bounding_box(_iter_coordinates(file))
+    return _count_strip(file, top_left, bottom_right, tile_size, low_limit, max_parts)
+
+
+def get_vent_count_tiled(
+    file: str = "input.txt",
+    low_limit: int = 2,
+    skip_diagonals: bool = True,
+    memory_limit: int = 64 * 2**20,
+    workers: Optional[int] = None,
+) -> int:
+    """Count overlapping vents of lines in the file, splitting plane into tiles.
+
+    The file is parsed once, parts of lines in each band of tiles are written
+    to a temporary file of binary coordinates. Each band is processed by
+    a worker process, which reads only its own file. Half of `memory_limit`
+    bounds the tile counter grid, the other half the parts of lines in a strip
+    of tiles (`PART_BYTES` each), so a worker takes at most about
+    `memory_limit` bytes plus a block of `LINES_PER_BLOCK` lines being read.
+    Dense bands are processed in several strips, reading the file again for
+    each of them.
+    """
+    if low_limit > DenseOceanFloor.MAX_COUNT:
+        raise ValueError(f"Limit too high for tiled floor: {low_limit}")
+    tile_size = max(1, math.isqrt(memory_limit // 2))
+    max_parts = max(1, memory_limit // 2 // PART_BYTES)
+
+    with tempfile.TemporaryDirectory() as directory:
+        band_files = _write_bands(file, directory, tile_size, skip_diagonals)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_count_band, band_file, tile_size, low_limit, max_parts)
+                for band_file in band_files
+            ]
+            return sum(future.result() for future in futures)
+
+
 if __name__ == "__main__":
     lines = parse_input("input.txt")
     for idx, solution in enumerate(
@@ -1,6 +1,29 @@
 """https://adventofcode.com/2021/day/6"""
 
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TMatrix = List[List[int]]
+
+
+def _count_timers(initial_state: Iterable[int], first_child_days: int) -> List[int]:
+    counter = [0] * first_child_days  # counter for all possible timer states
+    for fish in initial_state:
+        counter[fish] += 1
+
+    return counter
+
+
+def _make_day(
+    counter: List[int], first_child_days: int, other_child_days: int
+) -> None:
+    """Update counter of timer states in place, by one day."""
+    new_fish = counter[0]
+    i = 1
+    while i < len(counter):
+        counter[i - 1] = counter[i]
+        i += 1
+    counter[other_child_days - 1] += new_fish
+    counter[first_child_days - 1] = new_fish
 
 
 def get_fish_count(
@@ -10,22 +33,89 @@ def get_fish_count(
     other_child_days: int = 7,
 ) -> int:
     """Calculate number of fish after given number of days."""
-    counter = [0] * first_child_days  # counter for all possible timer states
-    for fish in initial_state:
-        counter[fish] += 1
-
+    counter = _count_timers(initial_state, first_child_days)
     for _ in range(days):
-        new_fish = counter[0]
-        i = 1
-        while i < len(counter):
-            counter[i - 1] = counter[i]
-            i += 1
-        counter[other_child_days - 1] += new_fish
-        counter[first_child_days - 1] = new_fish
+        _make_day(counter, first_child_days, other_child_days)
 
     return sum(counter)
 
 
+class FishGrowth:
+    """Fish counts after any number of days in O(log(days)) matrix products.
+
+    One day is a linear map of the timer counter, given by transition matrix.
+    Powers of the matrix to powers of two are computed once and cached, and
+    so are fish counts per single fish of each timer state for queried days.
+    With `modulus`, all counts are computed modulo it.
+    """
+
+    def __init__(
+        self,
+        first_child_days: int = 9,
+        other_child_days: int = 7,
+        modulus: Optional[int] = None,
+    ) -> None:
+        self.first_child_days = first_child_days
+        self.other_child_days = other_child_days
+        self.modulus = modulus
+        self.powers: List[TMatrix] = [self._transition_matrix()]
+        self.totals: Dict[int, List[int]] = {}
+
+    def _transition_matrix(self) -> TMatrix:
+        """Matrix with counts of fish in state `row` made by one in state `col`."""
+        size = self.first_child_days
+        columns = []
+        for state in range(size):
+            counter = [0] * size
+            counter[state] = 1
+            _make_day(counter, self.first_child_days, self.other_child_days)
+            columns.append(counter)
+
+        return [list(row) for row in zip(*columns)]
+
+    def _reduce(self, value: int) -> int:
+        return value if self.modulus is None else value % self.modulus
+
+    def _multiply(self, vector: List[int], matrix: TMatrix) -> List[int]:
+        """Multiply row vector by matrix."""
+        return [
+            self._reduce(sum(v * m for v, m in zip(vector, column)))
+            for column in zip(*matrix)
+        ]
+
+    def _power(self, exponent: int) -> TMatrix:
+        """Return transition matrix to the power of `2 ** exponent`."""
+        while len(self.powers) <= exponent:
+            last = self.powers[-1]
+            self.powers.append([self._multiply(row, last) for row in last])
+
+        return self.powers[exponent]
+
+    def fish_per_timer(self, days: int) -> List[int]:
+        """Fish count after given days for a single fish in each timer state."""
+        if days < 0:
+            raise ValueError(f"Number of days cannot be negative: {days}")
+        if days not in self.totals:
+            totals = [self._reduce(1)] * self.first_child_days
+            exponent = 0
+            while days >> exponent:
+                if (days >> exponent) & 1:
+                    totals = self._multiply(totals, self._power(exponent))
+                exponent += 1
+            self.totals[days] = totals
+
+        return self.totals[days]
+
+    def count(self, initial_state: Iterable[int], days: int) -> int:
+        counter = _count_timers(initial_state, self.first_child_days)
+        totals = self.fish_per_timer(days)
+        return self._reduce(sum(c * t for c, t in zip(counter, totals)))
+
+    def count_many(self, queries: Iterable[Tuple[List[int], int]]) -> List[int]:
+        """Answer batch of (initial state, days) queries."""
+        return [self.count(state, days) for state, days in queries]
+
+
 def parse_input(file: str = "input_example.txt") -> List[int]:
     with open(file, "r", encoding="utf-8") as fh:
         return [int(n) for n in next(fh).strip().split(",")]
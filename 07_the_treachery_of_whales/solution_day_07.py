@@ -1,6 +1,10 @@
 """https://adventofcode.com/2021/day/7"""
 
-from typing import List, Callable
+import bisect
+import decimal
+import itertools
+import operator
+from typing import List, Callable, Iterable, Sequence, Tuple
 
 TCostFunc = Callable[[List[int], int], int]
 
@@ -55,6 +59,142 @@ def find_lowest_consumption(
     return cost_mid
 
 
+class CrabIndex:
+    """Sorted crab positions with prefix sums, answering costs in O(log(n)).
+
+    Crabs left of the point are found by bisect, so the sum of distances is
+    a difference of sums of positions. Triangular cost d * (d + 1) / 2 adds
+    sum of squared distances, which is a sum of (crab - point) ** 2 and so
+    follows from sums of squared positions, positions and crab count.
+    """
+
+    def __init__(self, crabs: Iterable[int]) -> None:
+        self.positions = sorted(crabs)
+        if not self.positions:
+            raise ValueError("No crabs to index")
+        self.sums = list(itertools.accumulate(self.positions, initial=0))
+        squares = map(operator.mul, self.positions, self.positions)
+        self.square_sums = list(itertools.accumulate(squares, initial=0))
+
+    def fuel_to_point_1(self, point: int) -> int:
+        """Same as `fuel_to_point_1` for indexed crabs."""
+        count = len(self.positions)
+        left = bisect.bisect_right(self.positions, point)
+        left_sum = self.sums[left]
+        right_sum = self.sums[-1] - left_sum
+
+        return point * left - left_sum + right_sum - point * (count - left)
+
+    def fuel_to_point_2(self, point: int) -> int:
+        """Same as `fuel_to_point_2` for indexed crabs."""
+        count = len(self.positions)
+        squared_distances = (
+            self.square_sums[-1] - 2 * point * self.sums[-1] + count * point**2
+        )
+        return (squared_distances + self.fuel_to_point_1(point)) // 2
+
+    def lowest_consumption_1(self) -> int:
+        """Sum of distances is lowest at median."""
+        return self.fuel_to_point_1(self.positions[(len(self.positions) - 1) // 2])
+
+    def lowest_consumption_2(self) -> int:
+        """Triangular cost is lowest within 1/2 from the mean position."""
+        mean = self.sums[-1] // len(self.positions)
+        candidates = range(
+            max(mean - 1, self.positions[0]), min(mean + 2, self.positions[-1]) + 1
+        )
+        return min(self.fuel_to_point_2(point) for point in candidates)
+
+
+def position_histogram(crabs: List[int]) -> Tuple[int, List[int]]:
+    """Return the lowest position and counts of crabs at each position from it."""
+    low = min(crabs)
+    histogram = [0] * (max(crabs) - low + 1)
+    for crab in crabs:
+        histogram[crab - low] += 1
+
+    return low, histogram
+
+
+def fuel_curve_1(crabs: List[int]) -> List[int]:
+    """Costs as of `fuel_to_point_1` for each point from min to max crab.
+
+    Moving the point by one to the right costs one more for each crab at or
+    left of it and one less for all other crabs, so costs are cumulative sums.
+    """
+    low, histogram = position_histogram(crabs)
+    count = len(crabs)
+    left_counts = itertools.accumulate(histogram[:-1])
+    changes = (2 * left - count for left in left_counts)
+    first = sum(crabs) - count * low
+
+    return list(itertools.accumulate(changes, initial=first))
+
+
+def fuel_curve_2(crabs: List[int]) -> List[int]:
+    """Costs as of `fuel_to_point_2` for each point from min to max crab.
+
+    Moving the point from `p` to the right, distance `d` of crabs at or left of
+    it grows and costs `d + 1` more, others get closer and cost `d` less.
+    Together it is `count * p - sum(crabs) + left_count`.
+    """
+    low, histogram = position_histogram(crabs)
+    count = len(crabs)
+    total = sum(crabs)
+    left_counts = itertools.accumulate(histogram[:-1])
+    changes = (
+        count * point - total + left
+        for point, left in zip(itertools.count(low), left_counts)
+    )
+    first = sum((crab - low) * (crab - low + 1) // 2 for crab in crabs)
+
+    return list(itertools.accumulate(changes, initial=first))
+
+
+def _pack(values: Sequence[int], lane_digits: int) -> decimal.Decimal:
+    """Pack non-negative values into decimal lanes of a number, first is lowest."""
+    lanes = (f"{value:0{lane_digits}d}" for value in reversed(values))
+    return decimal.Decimal("".join(lanes))
+
+
+def fuel_curve(crabs: List[int], costs: Sequence[int]) -> List[int]:
+    """Costs for each point from min to max crab, for any fuel model.
+
+    `costs[d]` is fuel burned by a crab to move by distance `d`, it has to
+    cover distances up to `max(crabs) - min(crabs)`. Curve is convolution of
+    the histogram of positions with the cost table mirrored around zero.
+    Both are packed into decimal lanes of numbers wide enough for any sum,
+    so a single multiplication computes all sums at once. `decimal` is used
+    because it multiplies huge numbers much faster than `int`.
+    """
+    low, histogram = position_histogram(crabs)
+    size = len(histogram)
+    if len(costs) < size:
+        raise ValueError(f"Cost table has to cover distances up to {size - 1}")
+    # costs to reach points left of position `p` are costs[p:0:-1]
+    mirrored = list(reversed(costs[1:size])) + list(costs[:size])
+    # every crab contributes one cost to each point, so an offset making all
+    # costs non-negative is subtracted afterwards once per crab
+    offset = -min(min(mirrored), 0)
+    if offset:
+        mirrored = [cost + offset for cost in mirrored]
+
+    lane_digits = len(str(len(crabs) * max(mirrored)))
+    context = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX)
+    product = context.multiply(
+        _pack(histogram, lane_digits), _pack(mirrored, lane_digits)
+    )
+    digits = str(product).rjust((3 * size - 1) * lane_digits, "0")
+
+    curve = []
+    for point in range(size):
+        end = len(digits) - (point + size - 1) * lane_digits
+        cost = int(digits[end - lane_digits : end])
+        curve.append(cost - offset * len(crabs))
+
+    return curve
+
+
 def parse_input(file: str = "input_example.txt") -> List[int]:
     with open(file, "r", encoding="utf-8") as fh:
         return [int(n) for n in next(fh).strip().split(",")]
@@ -1,7 +1,21 @@
 """https://adventofcode.com/2021/day/8"""
 
+import contextlib
+import functools
 import itertools
-from typing import List, Tuple, Dict, Set
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import (
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 WIRES = "abcdefg"
 DIGITS = {
@@ -19,83 +33,50 @@ DIGITS = {
 EASY_DIGITS_LENGTHS = {2: "cf", 3: "acf", 4: "bcdf", 7: "abcdefg"}
 
 TEntry = Tuple[List[str], List[str]]
+TSignature = FrozenSet[int]
+TChunkResult = Tuple[int, int, List[int]]
 
 
-def wires_to_digits(patterns: List[str]) -> Dict[str, str]:
-    """Return mapping of scrambled control wires to "easy digits" (1, 4, 7, 8).
+def pattern_mask(pattern: str) -> int:
+    """Represent set of wires as 7 bit mask, wire "a" is the lowest bit."""
+    mask = 0
+    for wire in pattern:
+        mask |= 1 << (ord(wire) - ord("a"))
 
-    Keys are sorted by length.
-    """
-    mapping = {}
-    for pattern in sorted(patterns, key=len):
-        digit = EASY_DIGITS_LENGTHS.get(len(pattern))
-        if digit is None:
-            continue
-        mapping[pattern] = digit
-
-    return mapping
+    return mask
 
 
-def wires_to_possible_segments(patterns: List[str]) -> Dict[str, List[str]]:
-    """Return mapping of single control wires to possible segments.
+@functools.lru_cache(maxsize=None)
+def signature_table() -> Dict[TSignature, Dict[int, int]]:
+    """Map set of ten scrambled patterns to digits for each of their masks.
 
-    Keys are sorted alphabetically.
+    There is one entry for each of 5040 possible wire permutations,
+    computed once per process.
     """
-    mapping = {}
-    mapped_segments: Set[str] = set()
-    for wires, digit_segments in wires_to_digits(patterns).items():
-        unused = set(digit_segments) - mapped_segments
-        for wire in wires:
-            if wire not in mapping:
-                mapping[wire] = list(unused)
-        mapped_segments |= unused
-
-    return {k: v for k, v in sorted(mapping.items())}
-
-
-def fix_digit(segments: str, mapping: Dict[str, str]) -> str:
-    """Translate scrambled string of segments to display digit."""
-    return "".join(sorted(segments.translate(str.maketrans(mapping))))  # type: ignore
-
-
-def is_digit_valid(segments: str) -> bool:
-    """Check if string of segments represents correct display digit."""
-    return segments in DIGITS
-
-
-def wires_to_correct_segments(patterns: List[str]) -> Dict[str, str]:
-    """Return mapping of each control wire to correct segment."""
-    mapping = wires_to_possible_segments(patterns)
-    for segments in itertools.product(*mapping.values()):
-        single_segment_mapping = dict(zip(WIRES, segments))
-        for pattern in patterns:
-            digit = fix_digit(pattern, single_segment_mapping)
-            if not is_digit_valid(digit):
-                break
-        else:
-            return single_segment_mapping
-    return {}
-
-
-def patterns_to_ints(patterns: List[str], mapping: Dict[str, str]) -> List[int]:
-    """Convert list of scrambled segments to integers."""
-    ints = []
-    for pattern in patterns:
-        ints.append(DIGITS[fix_digit(pattern, mapping)])
+    table = {}
+    for wires in itertools.permutations(WIRES):
+        mapping = str.maketrans(WIRES, "".join(wires))
+        digits = {
+            pattern_mask(segments.translate(mapping)): digit
+            for segments, digit in DIGITS.items()
+        }
+        table[frozenset(digits)] = digits
 
-    return ints
+    return table
 
 
 def get_number(entry: TEntry) -> int:
     """Decode entry to number that's supposed to be on the display."""
     patterns, digits = entry
-    mapping = wires_to_correct_segments(patterns)
-    ints = patterns_to_ints(digits, mapping)
+    signature = frozenset(pattern_mask(pattern) for pattern in patterns)
+    mask_digits = signature_table().get(signature)
+    if mask_digits is None:
+        raise ValueError(f"Patterns cannot be decoded: {patterns}")
 
-    result = ints[0]
-    for n in ints[1:]:
+    result = 0
+    for digit in digits:
         result *= 10
-        result += n
+        result += mask_digits[pattern_mask(digit)]
 
     return result
 
@@ -116,19 +97,83 @@ def count_easy_digits(entries: List[TEntry]) -> int:
     return count
 
 
-def parse_input(file: str = "input.txt") -> List[TEntry]:
+def parse_lines(lines: Iterable[str]) -> List[TEntry]:
     entries = []
-    with open(file, "r", encoding="utf-8") as fh:
-        for line in fh:
-            line = line.strip()
-            if not line:
-                continue
-            patterns, digits = line.split(" | ")
-            entries.append((patterns.split(), digits.split()))
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        patterns, digits = line.split(" | ")
+        entries.append((patterns.split(), digits.split()))
 
     return entries
 
 
+def parse_input(file: str = "input.txt") -> List[TEntry]:
+    with open(file, "r", encoding="utf-8") as fh:
+        return parse_lines(fh)
+
+
+def iter_chunks(file: str, chunk_size: int = 2**20) -> Iterator[str]:
+    """Read file in chunks of about `chunk_size` characters, ending at line end."""
+    with open(file, "r", encoding="utf-8") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                return
+            if not chunk.endswith("\n"):
+                chunk += fh.readline()
+            yield chunk
+
+
+def decode_chunk(chunk: str, with_numbers: bool = False) -> TChunkResult:
+    """Return count of easy digits, sum of numbers and numbers if requested."""
+    entries = parse_lines(chunk.splitlines())
+    numbers = [get_number(entry) for entry in entries]
+    return count_easy_digits(entries), sum(numbers), numbers if with_numbers else []
+
+
+def decode_file(
+    file: str = "input.txt",
+    output: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 2**20,
+) -> Tuple[int, int]:
+    """Solve both parts in one pass over the file, decoding chunks in parallel.
+
+    Only a few chunks per worker are in flight at once, so memory does not
+    grow with the file size. If `output` is given, decoded numbers are written
+    to it, one per line, in order of the entries.
+    """
+    workers = workers or os.cpu_count() or 1
+    easy_digits = 0
+    total = 0
+    pending: Deque["Future[TChunkResult]"] = deque()
+
+    with contextlib.ExitStack() as stack:
+        out = None
+        if output is not None:
+            out = stack.enter_context(open(output, "w", encoding="utf-8"))
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+
+        def collect() -> None:
+            nonlocal easy_digits, total
+            chunk_easy_digits, chunk_total, numbers = pending.popleft().result()
+            easy_digits += chunk_easy_digits
+            total += chunk_total
+            if out is not None:
+                out.writelines(f"{number}\n" for number in numbers)
+
+        for chunk in iter_chunks(file, chunk_size):
+            pending.append(executor.submit(decode_chunk, chunk, out is not None))
+            if len(pending) >= 2 * workers:
+                collect()
+        while pending:
+            collect()
+
+    return easy_digits, total
+
+
 if __name__ == "__main__":
     lines = parse_input("input.txt")
     for idx, solution in enumerate([count_easy_digits(lines), get_sum(lines)]):
@@ -1,10 +1,33 @@
 """https://adventofcode.com/2021/day/9"""
 
+import bisect
 import math
-from collections import deque
-from typing import List, Tuple, Set, Optional
+import mmap
+import os
+import re
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 TPoint = Tuple[int, int]
+TRun = Tuple[int, int]  # first and after last column of cells lower than 9
+
+# runs of cells that are part of some basin
+BASIN_RUN = re.compile(b"[\x00-\x08]+")
+DIGITS_TO_HEIGHTS = bytes.maketrans(b"0123456789", bytes(range(10)))
+# peak memory of a tile worker measured by tracemalloc, the worst case is
+# a basin on every other cell, lists of runs of a few rows take the rest
+TILE_BYTES_PER_CELL = 17
+TILE_BYTES_PER_COLUMN = 200
+
+
+def _popcount(number: int) -> int:
+    return bin(number).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)  # int.bit_count in python 3.10+
 
 
 class HeightMap:
@@ -85,6 +108,569 @@ class HeightMap:
         return math.prod(sorted(basin_sizes, reverse=True)[:3])
 
 
+class _Search:
+    """Breadth first search of one part of a split basin."""
+
+    def __init__(self, start: TPoint) -> None:
+        self.frontier = deque([start])
+        self.cells = {start}
+
+
+class DynamicHeightMap(HeightMap):
+    """Height map with changing heights, keeping the answers up to date.
+
+    Each cell lower than 9 is labeled by its basin. A change of height
+    re-checks low points only around the changed cell. Basins are updated
+    only when the cell becomes 9 or stops being 9: joined basins keep
+    label of the largest one, a split basin is searched from all sides at
+    once, so only the smaller parts are visited and relabeled.
+    """
+
+    NO_BASIN = -1
+
+    def __init__(self, heights: List[List[int]]) -> None:
+        super().__init__([row.copy() for row in heights])
+        self.labels = [[self.NO_BASIN] * self.width for _ in range(self.height)]
+        self.basin_sizes: Dict[int, int] = {}
+        self.low_counts: Dict[int, int] = defaultdict(int)
+        self.next_label = 0
+        self.low_set: Set[TPoint] = set()
+        self.risk_level = 0
+        # (size, label) of basins with low points, sorted
+        self.ranked: List[Tuple[int, int]] = []
+
+        for coord_y in range(self.height):
+            for coord_x in range(self.width):
+                if (
+                    self.point_height(coord_x, coord_y) < HeightMap.MAX_HEIGHT
+                    and self.labels[coord_y][coord_x] == self.NO_BASIN
+                ):
+                    self._new_basin(self.get_basin((coord_x, coord_y)))
+        for coord_y in range(self.height):
+            for coord_x in range(self.width):
+                if self.is_low_point(coord_x, coord_y):
+                    self._add_low((coord_x, coord_y))
+
+    def _new_basin(self, cells: Iterable[TPoint]) -> int:
+        label = self.next_label
+        self.next_label += 1
+        size = 0
+        for coord_x, coord_y in cells:
+            self.labels[coord_y][coord_x] = label
+            size += 1
+        self.basin_sizes[label] = size
+        return label
+
+    def _detach(self, label: int) -> None:
+        """Remove basin from the ranking before it changes."""
+        if self.low_counts[label]:
+            item = (self.basin_sizes[label], label)
+            del self.ranked[bisect.bisect_left(self.ranked, item)]
+
+    def _attach(self, label: int) -> None:
+        """Return basin to the ranking after it changed."""
+        if self.low_counts[label]:
+            bisect.insort(self.ranked, (self.basin_sizes[label], label))
+
+    def _add_low(self, point: TPoint) -> None:
+        label = self.labels[point[1]][point[0]]
+        self.low_set.add(point)
+        self.risk_level += self.point_height(*point) + 1
+        self._detach(label)
+        self.low_counts[label] += 1
+        self._attach(label)
+
+    def _remove_low(self, point: TPoint) -> None:
+        label = self.labels[point[1]][point[0]]
+        self.low_set.remove(point)
+        self.risk_level -= self.point_height(*point) + 1
+        self._detach(label)
+        self.low_counts[label] -= 1
+        self._attach(label)
+
+    def largest_basin_sizes(self, count: int = 3) -> List[int]:
+        """Sizes of basins of low points, largest first.
+
+        Basin with more low points is counted once for each of them.
+        """
+        sizes: List[int] = []
+        for size, label in reversed(self.ranked):
+            sizes.extend([size] * min(self.low_counts[label], count - len(sizes)))
+            if len(sizes) == count:
+                break
+
+        return sizes
+
+    def _basin_neighbors(self, point: TPoint) -> List[TPoint]:
+        return [
+            adjacent
+            for adjacent in self.adjacent_points(*point)
+            if self.labels[adjacent[1]][adjacent[0]] != self.NO_BASIN
+        ]
+
+    def _join_basins(self, point: TPoint) -> None:
+        """Add the point to basins around, joining them together."""
+        starts = {self.labels[y][x]: (x, y) for x, y in self._basin_neighbors(point)}
+        labels = set(starts)
+        if not labels:
+            self._new_basin([point])
+            return
+
+        for label in labels:
+            self._detach(label)
+        target = max(labels, key=self.basin_sizes.__getitem__)
+        for label in labels - {target}:
+            for coord_x, coord_y in self._basin_cells(starts[label]):
+                self.labels[coord_y][coord_x] = target
+            self.basin_sizes[target] += self.basin_sizes.pop(label)
+            self.low_counts[target] += self.low_counts.pop(label)
+        self.labels[point[1]][point[0]] = target
+        self.basin_sizes[target] += 1
+        self._attach(target)
+
+    def _basin_cells(self, start: TPoint) -> List[TPoint]:
+        label = self.labels[start[1]][start[0]]
+        seen = {start}
+        to_visit = deque([start])
+        while to_visit:
+            current = to_visit.popleft()
+            for adjacent in self.adjacent_points(*current):
+                if (
+                    self.labels[adjacent[1]][adjacent[0]] == label
+                    and adjacent not in seen
+                ):
+                    to_visit.append(adjacent)
+                    seen.add(adjacent)
+
+        return list(seen)
+
+    def _split_basin(self, point: TPoint) -> None:
+        """Remove the point from its basin, splitting it if needed."""
+        label = self.labels[point[1]][point[0]]
+        self._detach(label)
+        self.labels[point[1]][point[0]] = self.NO_BASIN
+        self.basin_sizes[label] -= 1
+
+        # search all parts at once, until only one part is not fully visited
+        searches = [_Search(start) for start in self._basin_neighbors(point)]
+        owners = {search.frontier[0]: search for search in searches}
+        finished = []
+        while len(searches) > 1:
+            for search in searches.copy():
+                if search not in searches:
+                    continue  # merged into other search in this round
+                if not search.frontier:
+                    searches.remove(search)
+                    finished.append(search)
+                    continue
+                current = search.frontier.popleft()
+                for adjacent in self._basin_neighbors(current):
+                    other = owners.get(adjacent)
+                    if other is None:
+                        owners[adjacent] = search
+                        search.cells.add(adjacent)
+                        search.frontier.append(adjacent)
+                    elif other is not search:
+                        # both searches are in the same part, keep the larger
+                        if len(search.cells) < len(other.cells):
+                            search, other = other, search
+                        for cell in other.cells:
+                            owners[cell] = search
+                        search.cells |= other.cells
+                        search.frontier.extend(other.frontier)
+                        searches.remove(other)
+
+        for search in finished:
+            part = self._new_basin(search.cells)
+            self.basin_sizes[label] -= len(search.cells)
+            lows = len(search.cells & self.low_set)
+            self.low_counts[part] += lows
+            self.low_counts[label] -= lows
+            self._attach(part)
+        if searches:
+            self._attach(label)
+        else:
+            del self.basin_sizes[label]
+            del self.low_counts[label]
+
+    def set_height(self, coord_x: int, coord_y: int, value: int) -> None:
+        """Change height of the point, update low points and basins around."""
+        if not 0 <= value <= HeightMap.MAX_HEIGHT:
+            raise ValueError(f"Invalid height: {value}")
+        old_value = self.point_height(coord_x, coord_y)
+        if old_value == value:
+            return
+
+        point = (coord_x, coord_y)
+        around = [point] + self.adjacent_points(coord_x, coord_y)
+        for near in around:
+            if near in self.low_set:
+                self._remove_low(near)
+
+        self.heights[coord_y][coord_x] = value
+        if old_value == HeightMap.MAX_HEIGHT:
+            self._join_basins(point)
+        elif value == HeightMap.MAX_HEIGHT:
+            self._split_basin(point)
+
+        for near in around:
+            if self.is_low_point(*near):
+                self._add_low(near)
+
+    def low_points(self) -> List[TPoint]:
+        return sorted(self.low_set, key=lambda point: (point[1], point[0]))
+
+    def total_risk_level(self) -> int:
+        """Answer part 1."""
+        return self.risk_level
+
+    def largest_basins_product(self) -> int:
+        """Answer part 2."""
+        return math.prod(self.largest_basin_sizes())
+
+
+def overlapping_runs(
+    runs_1: List[TRun], runs_2: List[TRun]
+) -> Iterator[Tuple[int, int]]:
+    """Yield indices of overlapping runs from two sorted lists of runs."""
+    idx_1 = idx_2 = 0
+    while idx_1 < len(runs_1) and idx_2 < len(runs_2):
+        (start_1, end_1), (start_2, end_2) = runs_1[idx_1], runs_2[idx_2]
+        if start_1 < end_2 and start_2 < end_1:
+            yield idx_1, idx_2
+        if end_1 < end_2:
+            idx_1 += 1
+        else:
+            idx_2 += 1
+
+
+class BasinLabels:
+    """Union-find of basin parts, usually runs of cells in consecutive rows."""
+
+    def __init__(self) -> None:
+        # one entry for each part, compact as there may be millions of parts
+        self.parents = array("q")
+        self.sizes = array("q")
+        self.previous: List[TRun] = []
+        self.previous_ids: List[int] = []
+
+    def add(self, size: int) -> int:
+        """Add new part of given size, return its label."""
+        label = len(self.parents)
+        self.parents.append(label)
+        self.sizes.append(size)
+        return label
+
+    def find(self, label: int) -> int:
+        parents = self.parents
+        while parents[label] != label:
+            parents[label] = parents[parents[label]]
+            label = parents[label]
+        return label
+
+    def union(self, label_1: int, label_2: int) -> None:
+        root_1 = self.find(label_1)
+        root_2 = self.find(label_2)
+        if root_1 == root_2:
+            return
+        if self.sizes[root_1] < self.sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parents[root_2] = root_1
+        self.sizes[root_1] += self.sizes[root_2]
+
+    def size(self, label: int) -> int:
+        """Size of the whole basin containing the part."""
+        return self.sizes[self.find(label)]
+
+    def add_row(self, row: bytes) -> Tuple[List[TRun], List[int]]:
+        """Add runs of basin cells of the next row, join them with previous row.
+
+        Returns the runs and their labels.
+        """
+        runs = [match.span() for match in BASIN_RUN.finditer(row)]
+        ids = [self.add(end - start) for start, end in runs]
+        for idx_1, idx_2 in overlapping_runs(self.previous, runs):
+            self.union(self.previous_ids[idx_1], ids[idx_2])
+        self.previous, self.previous_ids = runs, ids
+        return runs, ids
+
+
+def find_low_mask(cells: bytes, stride: int, region: int = -1) -> Tuple[int, int]:
+    """Find low points of padded cells, shifting masks of lower cells.
+
+    Cells are laid out as in `PackedHeightMap`. Returns total risk level and
+    mask with the lowest bit of each low point's byte set, only cells with
+    the bit set in `region` mask are considered.
+    """
+    risk_level = 0
+    low_mask = 0
+    lower_or_equal = 0
+    row_shift = 8 * stride
+    for height in range(HeightMap.MAX_HEIGHT):
+        table = bytes(int(h == height) for h in range(256))
+        equal = int.from_bytes(cells.translate(table), "little")
+        lower_or_equal |= equal
+        # cells with a neighbor of this height or lower
+        near = lower_or_equal << 8 | lower_or_equal >> 8
+        near |= lower_or_equal << row_shift | lower_or_equal >> row_shift
+        lows = equal & ~near & region
+        risk_level += (height + 1) * popcount(lows)
+        low_mask |= lows
+
+    return risk_level, low_mask
+
+
+class PackedHeightMap:
+    """Height map stored as bytes, analyzed without visiting cells one by one.
+
+    Rows are joined into a single bytes object, padded by a border of
+    `PADDING` height, so that neighbors of a cell are at offsets +-1 and
+    +-`stride`. Cells with height at most `h` form a bit mask (one byte
+    per cell), shifting the mask by neighbor offsets shows cells having such
+    neighbor, so low points of all heights are found by a few big integer
+    operations. Basins are labeled in a single pass over rows: runs of cells
+    lower than 9 are joined with overlapping runs of previous row by
+    union-find.
+    """
+
+    PADDING = 10
+
+    def __init__(self, heights: Sequence[Sequence[int]]) -> None:
+        self.width = len(heights[0])
+        self.height = len(heights)
+        self.stride = self.width + 1
+        border = bytes([self.PADDING])
+        padding_row = border * self.stride
+        self.rows = [bytes(row) for row in heights]
+        self.cells = padding_row + b"".join(row + border for row in self.rows)
+        self.cells += padding_row
+        self.lows: Optional[List[TPoint]] = None
+        self.risk_level: Optional[int] = None
+
+    def _point(self, offset: int) -> TPoint:
+        y, x = divmod(offset, self.stride)
+        return x, y - 1
+
+    def _find_low_points(self) -> None:
+        self.lows = []
+        self.risk_level, low_mask = find_low_mask(self.cells, self.stride)
+        low_bytes = low_mask.to_bytes(len(self.cells), "little")
+        offset = low_bytes.find(1)
+        while offset != -1:
+            self.lows.append(self._point(offset))
+            offset = low_bytes.find(1, offset + 1)
+
+    def low_points(self) -> List[TPoint]:
+        if self.lows is None:
+            self._find_low_points()
+        return list(self.lows or [])
+
+    def total_risk_level(self) -> int:
+        """Answer part 1."""
+        if self.risk_level is None:
+            self._find_low_points()
+        return self.risk_level or 0
+
+    def basin_sizes(self) -> List[int]:
+        """Sizes of basins of all low points, in order of `low_points`."""
+        lows = self.low_points()
+        lows_by_row: List[List[int]] = [[] for _ in range(self.height)]
+        for idx, (_, y) in enumerate(lows):
+            lows_by_row[y].append(idx)
+        low_runs = [0] * len(lows)
+
+        labels = BasinLabels()
+        for y, row in enumerate(self.rows):
+            runs, ids = labels.add_row(row)
+            if lows_by_row[y]:
+                starts = [start for start, _ in runs]
+                for idx in lows_by_row[y]:
+                    low_runs[idx] = ids[bisect.bisect_right(starts, lows[idx][0]) - 1]
+
+        return [labels.size(run) for run in low_runs]
+
+    def largest_basins_product(self) -> int:
+        """Answer part 2."""
+        return math.prod(sorted(self.basin_sizes(), reverse=True)[:3])
+
+
+def parse_input_packed(file: str = "input.txt") -> List[bytes]:
+    """Read heights as rows of bytes, one byte per height."""
+    heightmap = []
+    with open(file, "rb") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            heightmap.append(line.translate(DIGITS_TO_HEIGHTS))
+
+    return heightmap
+
+
+@dataclass
+class TileSummary:
+    """Low points and basin parts of a band of rows, see `_analyze_tile`.
+
+    Only basins with a low point or touching the first or the last row
+    of the tile are kept, other basins can't affect the answers. They are
+    numbered from 0, `low_labels` has a basin of each low point.
+    """
+
+    risk_level: int
+    low_labels: "array[int]"
+    sizes: "array[int]"
+    first_runs: List[TRun]
+    first_labels: List[int]
+    last_runs: List[TRun]
+    last_labels: List[int]
+
+
+def _analyze_tile(file: str, width: int, y_first: int, y_last: int) -> TileSummary:
+    """Analyze rows `y_first` to `y_last` of memory mapped heights file.
+
+    Rows next to the tile are read as well, to decide about low points
+    at its edges. Low points are kept as a byte mask of the tile, so memory
+    is bounded by `TILE_BYTES_PER_CELL` and `TILE_BYTES_PER_COLUMN`.
+    """
+    height = os.path.getsize(file) // width
+    halo_first = max(y_first - 1, 0)
+    halo_last = min(y_last + 1, height - 1)
+    with open(file, "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as heights:
+            cells = heights[halo_first * width : (halo_last + 1) * width]
+
+    stride = width + 1
+    border = bytes([PackedHeightMap.PADDING])
+    padded = bytearray(border * stride)
+    for start in range(0, len(cells), width):
+        padded += cells[start : start + width]
+        padded += border
+    padded += border * stride
+
+    row_offset = y_first - halo_first
+    tile_rows = y_last - y_first + 1
+    first_lane = (row_offset + 1) * stride
+    region = int.from_bytes(bytes([1]) * tile_rows * stride, "little")
+    region <<= 8 * first_lane
+    risk_level, low_mask = find_low_mask(bytes(padded), stride, region)
+    del padded, region
+    low_bytes = low_mask.to_bytes(first_lane + tile_rows * stride, "little")
+    del low_mask
+
+    labels = BasinLabels()
+    low_labels = array("q")
+    for y in range(tile_rows):
+        row_start = (row_offset + y) * width
+        runs, ids = labels.add_row(cells[row_start : row_start + width])
+        if y == 0:
+            first_runs, first_labels = runs, ids
+        lows_start = first_lane + y * stride
+        row_lows = low_bytes[lows_start : lows_start + width]
+        x = row_lows.find(1)
+        if x != -1:
+            starts = [start for start, _ in runs]
+        while x != -1:
+            low_labels.append(ids[bisect.bisect_right(starts, x) - 1])
+            x = row_lows.find(1, x + 1)
+    last_runs, last_labels = runs, ids
+    del cells, low_bytes
+
+    # renumber basins that are kept from 0, their sizes are replaced by
+    # negative numbers to save memory
+    sizes = array("q")
+
+    def number(label: int) -> int:
+        root = labels.find(label)
+        if labels.sizes[root] > 0:
+            sizes.append(labels.sizes[root])
+            labels.sizes[root] = -len(sizes)
+        return -labels.sizes[root] - 1
+
+    for idx, label in enumerate(low_labels):
+        low_labels[idx] = number(label)
+    return TileSummary(
+        risk_level,
+        low_labels,
+        sizes,
+        first_runs,
+        [number(label) for label in first_labels],
+        last_runs,
+        [number(label) for label in last_labels],
+    )
+
+
+def convert_input(file: str = "input.txt", output: str = "heights.bin") -> int:
+    """Write heights from input file as raw bytes, one byte per height.
+
+    The file is processed line by line, returns width of the map.
+    """
+    width = 0
+    with open(file, "rb") as fh_in, open(output, "wb") as fh_out:
+        for line in fh_in:
+            line = line.strip()
+            if not line:
+                continue
+            if width and len(line) != width:
+                raise ValueError(f"Row of invalid length: {len(line)}")
+            width = len(line)
+            fh_out.write(line.translate(DIGITS_TO_HEIGHTS))
+
+    return width
+
+
+def analyze_tiled(
+    file: str,
+    width: int,
+    memory_limit: int = 64 * 2**20,
+    workers: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Answer both parts for heights file written by `convert_input`.
+
+    The map is split into bands of full rows, each band is analyzed by
+    a worker process and takes at most about `memory_limit` bytes (but it
+    has at least one row).
+    Basins crossing edges of bands are merged afterwards.
+    """
+    height = os.path.getsize(file) // width
+    if not height:
+        raise ValueError(f"Empty height map: {file}")
+    tile_bytes = memory_limit - TILE_BYTES_PER_COLUMN * width
+    tile_height = max(1, tile_bytes // (TILE_BYTES_PER_CELL * width))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _analyze_tile,
+                file,
+                width,
+                y_first,
+                min(y_first + tile_height, height) - 1,
+            )
+            for y_first in range(0, height, tile_height)
+        ]
+        tiles = [future.result() for future in futures]
+
+    labels = BasinLabels()
+    tile_labels: List[List[int]] = []
+    for tile in tiles:
+        tile_labels.append([labels.add(size) for size in tile.sizes])
+    for idx in range(1, len(tiles)):
+        above, below = tiles[idx - 1], tiles[idx]
+        for idx_1, idx_2 in overlapping_runs(above.last_runs, below.first_runs):
+            labels.union(
+                tile_labels[idx - 1][above.last_labels[idx_1]],
+                tile_labels[idx][below.first_labels[idx_2]],
+            )
+
+    basin_sizes = [
+        labels.size(tile_labels[idx][label])
+        for idx, tile in enumerate(tiles)
+        for label in tile.low_labels
+    ]
+    risk_level = sum(tile.risk_level for tile in tiles)
+    return risk_level, math.prod(sorted(basin_sizes, reverse=True)[:3])
+
+
 def parse_input(file: str = "input.txt") -> List[List[int]]:
     heightmap = []
     with open(file, "r", encoding="utf-8") as fh:
@@ -1,9 +1,16 @@
 """https://adventofcode.com/2021/day/10"""
 
+import functools
+import itertools
+import os
+import random
+import re
 import statistics
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import Iterable, List, Optional, Sequence, Tuple
 
 LEFT = "([{<"
 RIGHT = ")]}>"
@@ -12,6 +19,34 @@ CLOSING = set(RIGHT)
 PAIRS = dict(zip(LEFT, RIGHT))
 POINTS_CORRUPTED = dict(zip(RIGHT, [3, 57, 1197, 25137]))
 POINTS_INCOMPLETE = dict(zip(RIGHT, [1, 2, 3, 4]))
+# points for closing the chunk opened by the bracket
+POINTS_COMPLETION = {left: POINTS_INCOMPLETE[right] for left, right in PAIRS.items()}
+MATCHED_PAIRS = [left + right for left, right in PAIRS.items()]
+# lines nested deeper are analyzed bracket by bracket
+MAX_REDUCTIONS = 64
+NOT_OPENING = re.compile("[^" + re.escape(LEFT) + "]")
+
+TChunkScores = Tuple[int, Sequence[int]]
+
+# codes of brackets used by `BracketAnalyzer`: opening brackets are 1 to 4,
+# closing brackets have code of their opening bracket + 4
+INVALID_CODE = 9
+BRACKET_CODES = bytes(
+    LEFT.index(chr(byte)) + 1
+    if chr(byte) in OPENING
+    else RIGHT.index(chr(byte)) + 5
+    if chr(byte) in CLOSING
+    else INVALID_CODE
+    for byte in range(256)
+)
+MATCHED_CODES = [bytes([code, code + 4]) for code in range(1, 5)]
+NOT_OPENING_CODE = re.compile(b"[^\x01-\x04]")
+# points for closing brackets are the same as their codes, so completion
+# score is the number written by codes in base 5
+CODE_DIGITS = bytes.maketrans(bytes(range(1, 5)), b"1234")
+LINE_ENDS = b"\r\n"
+# longest string of digits converted by `int` at once
+BASE_5_BLOCK = 4096
 
 
 class LineState(Enum):
@@ -72,6 +107,233 @@ def score_incomplete_lines(lines: List[str]) -> int:
     return int(statistics.median(sorted(line_scores)))
 
 
+def _reduce(line: str) -> Optional[str]:
+    """Remove matched pairs of brackets, until only unmatched remain.
+
+    Returns None for lines nested too deep to be reduced quickly.
+    """
+    for _ in range(MAX_REDUCTIONS):
+        reduced = line
+        for pair in MATCHED_PAIRS:
+            reduced = reduced.replace(pair, "")
+        if len(reduced) == len(line):
+            return line
+        line = reduced
+
+    return None
+
+
+def score_line(line: str) -> Tuple[LineState, int]:
+    """Return state of the line with its corrupted or incomplete line score."""
+    reduced = _reduce(line)
+    if reduced is None:
+        result = analyze_line(line)
+        if result.state == LineState.CORRUPTED:
+            return result.state, POINTS_CORRUPTED[result.characters]
+        reduced = "".join(LEFT[RIGHT.index(c)] for c in reversed(result.characters))
+
+    # first bracket not opening a chunk is the first one not matching
+    invalid = NOT_OPENING.search(reduced)
+    if invalid is not None:
+        return LineState.CORRUPTED, POINTS_CORRUPTED[invalid.group()]
+    if not reduced:
+        return LineState.OK, 0
+
+    score = 0
+    for bracket in reversed(reduced):
+        score = score * 5 + POINTS_COMPLETION[bracket]
+    return LineState.INCOMPLETE, score
+
+
+def _int_column(values: Iterable[int]) -> Sequence[int]:
+    """Store values in compact array, unless they overflow 64 bits."""
+    values = list(values)
+    try:
+        return array("q", values)
+    except OverflowError:
+        return values
+
+
+def score_file_range(
+    file: str, start: int = 0, end: Optional[int] = None
+) -> TChunkScores:
+    """Score lines starting in byte range [start, end) of the file.
+
+    Returns total score of corrupted lines and scores of incomplete lines.
+    """
+    corrupted = 0
+    incomplete = []
+    with open(file, "rb") as fh:
+        if start > 0:
+            fh.seek(start - 1)
+            fh.readline()  # skip line started in previous range
+        position = fh.tell()
+        for line in fh:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            state, score = score_line(line.decode())
+            if state == LineState.CORRUPTED:
+                corrupted += score
+            elif state == LineState.INCOMPLETE:
+                incomplete.append(score)
+
+    return corrupted, _int_column(incomplete)
+
+
+def select(values: List[int], k: int) -> int:
+    """Return k-th smallest value (from 0), in expected linear time."""
+    while True:
+        pivot = random.choice(values)
+        lower = [value for value in values if value < pivot]
+        if k < len(lower):
+            values = lower
+            continue
+        equal = values.count(pivot)
+        if k < len(lower) + equal:
+            return pivot
+        k -= len(lower) + equal
+        values = [value for value in values if value > pivot]
+
+
+def median(values: Iterable[int]) -> int:
+    """Same as `int(statistics.median(values))`, without sorting the values."""
+    values = list(values)
+    if not values:
+        raise statistics.StatisticsError("no median for empty data")
+    middle = len(values) // 2
+    if len(values) % 2:
+        return select(values, middle)
+    return int((select(values, middle - 1) + select(values, middle)) / 2)
+
+
+def split_file(file: str, parts: int) -> List[Tuple[int, int]]:
+    """Split file into given number of byte ranges of about the same size."""
+    size = os.path.getsize(file)
+    bounds = [size * part // parts for part in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def score_file(
+    file: str = "input.txt", workers: Optional[int] = None, chunks: int = 0
+) -> Tuple[int, int]:
+    """Answer both parts in a single pass, scoring chunks of the file in parallel.
+
+    By default the file is split into four chunks per worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_file(file, chunks or 4 * workers)
+
+    corrupted = 0
+    incomplete: List[Sequence[int]] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        starts, ends = zip(*ranges)
+        for chunk_corrupted, chunk_incomplete in executor.map(
+            score_file_range, itertools.repeat(file), starts, ends
+        ):
+            corrupted += chunk_corrupted
+            incomplete.append(chunk_incomplete)
+
+    return corrupted, median(itertools.chain.from_iterable(incomplete))
+
+
+@functools.lru_cache(maxsize=None)
+def _power_of_5(exponent: int) -> int:
+    return 5**exponent
+
+
+def _base_5(digits: bytes) -> int:
+    """Convert long string of base 5 digits to int.
+
+    Digits are split recursively, lower parts have power of two multiples
+    of `BASE_5_BLOCK` digits, so the powers of 5 are shared.
+    """
+    if len(digits) <= BASE_5_BLOCK:
+        return int(digits, 5) if digits else 0
+    low_length = BASE_5_BLOCK
+    while 2 * low_length < len(digits):
+        low_length *= 2
+    high = _base_5(digits[:-low_length])
+    return high * _power_of_5(low_length) + _base_5(digits[-low_length:])
+
+
+class BracketAnalyzer:
+    """Analyzer of a single line fed in chunks of bytes of any size.
+
+    Open brackets are kept as a stack of codes, one byte per bracket. Each
+    piece of data is translated to codes and reduced by removing matched
+    pairs first, so only brackets left unmatched are handled one by one.
+    Data after the first corrupted bracket are ignored, line end bytes
+    are skipped.
+    """
+
+    def __init__(self) -> None:
+        self.stack = bytearray()
+        self.corrupted: Optional[int] = None  # code of the corrupted bracket
+
+    def feed(self, data: bytes) -> None:
+        if self.corrupted is not None:
+            return
+        codes = data.translate(BRACKET_CODES, LINE_ENDS)
+        for _ in range(MAX_REDUCTIONS):
+            reduced = codes
+            for pair in MATCHED_CODES:
+                reduced = reduced.replace(pair, b"")
+            if len(reduced) == len(codes):
+                break
+            codes = reduced
+
+        match = NOT_OPENING_CODE.search(codes)
+        if match is None:
+            self.stack += codes
+            return
+        self.stack += codes[: match.start()]
+
+        stack = self.stack
+        for code in codes[match.start() :]:
+            if code < 5:
+                stack.append(code)
+            elif code != INVALID_CODE and stack and stack[-1] == code - 4:
+                stack.pop()
+            else:
+                self.corrupted = code
+                return
+
+    def state(self) -> LineState:
+        if self.corrupted is not None:
+            return LineState.CORRUPTED
+        if self.stack:
+            return LineState.INCOMPLETE
+        return LineState.OK
+
+    def score(self) -> int:
+        """Score of corrupted or incomplete line, as in `score_line`."""
+        if self.corrupted is not None:
+            if self.corrupted == INVALID_CODE:
+                raise ValueError("Invalid character in the line")
+            return POINTS_CORRUPTED[RIGHT[self.corrupted - 5]]
+        completion = self.stack[::-1].translate(CODE_DIGITS)
+        return _base_5(bytes(completion))
+
+
+def analyze_stream(
+    file: str = "input.txt", chunk_size: int = 2**20
+) -> Tuple[LineState, int]:
+    """Analyze file holding a single line, reading it in chunks."""
+    analyzer = BracketAnalyzer()
+    with open(file, "rb") as fh:
+        while analyzer.corrupted is None:
+            data = fh.read(chunk_size)
+            if not data:
+                break
+            analyzer.feed(data)
+
+    return analyzer.state(), analyzer.score()
+
+
 def parse_input(file: str = "input.txt") -> List[str]:
     lines = []
     with open(file, "r", encoding="utf-8") as fh:
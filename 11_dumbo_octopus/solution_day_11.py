@@ -1,11 +1,26 @@
 """https://adventofcode.com/2021/day/11"""
 
 import copy
+import hashlib
+import itertools
+from array import array
 from collections import deque
-from typing import List, Tuple, Set, Deque, Iterable
+from typing import List, Tuple, Set, Deque, Dict, Iterable, Optional, Union
 
 TPoint = Tuple[int, int]
 
+MAX_ENERGY = 9
+# added to each 8-bit lane of packed grid, to set its top bit when it flashes
+FLASH_OFFSET = 128 - (MAX_ENERGY + 1)
+ENERGY_DIGITS = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+
+def _popcount(number: int) -> int:
+    return bin(number).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)  # int.bit_count in python 3.10+
+
 
 class OctopusGrid:
     def __init__(self, octopuses: List[List[int]]) -> None:
@@ -16,6 +31,10 @@ class OctopusGrid:
     def __str__(self) -> str:
         return "\n".join("".join(map(str, row)) for row in self.grid)
 
+    def state(self) -> bytes:
+        """Energy of all octopuses, one byte each."""
+        return bytes(itertools.chain.from_iterable(self.grid))
+
     def find_neighbors(self, octopus: TPoint) -> List[TPoint]:
         x, y = octopus
         neighbors = []
@@ -88,6 +107,180 @@ class OctopusGrid:
         return self.width * self.height
 
 
+class PackedOctopusGrid:
+    """Octopus grid with all cells updated at once, packed in a big integer.
+
+    Each octopus takes an 8-bit lane, rows are separated by a padding lane
+    and there is a padding row above and below the grid, so neighbors are
+    at lane offsets +-1, +-stride and +-stride+-1. Flashing octopuses of each
+    wave are a mask with one bit per lane. Shifted copies of the mask are
+    summed, giving the number of flashing neighbors of every octopus. The
+    energy never exceeds 18, so lanes don't overflow.
+    """
+
+    def __init__(self, octopuses: List[List[int]]) -> None:
+        self.width = len(octopuses[0])
+        self.height = len(octopuses)
+        self.stride = self.width + 1
+        padding_row = bytes(self.stride)
+        cells = padding_row
+        for row in octopuses:
+            cells += bytes(row) + b"\x00"
+        cells += padding_row
+        self.length = len(cells)
+        self.energy = int.from_bytes(cells, "little")
+
+        cell_lanes = bytes([1]) * self.width + b"\x00"
+        self.ones = int.from_bytes(
+            padding_row + cell_lanes * self.height + padding_row, "little"
+        )
+        self.lanes = self.ones * 0xFF
+        self.flash_offset = self.ones * FLASH_OFFSET
+
+    def __str__(self) -> str:
+        cells = self.state()
+        rows = [
+            cells[start : start + self.width].translate(ENERGY_DIGITS).decode()
+            for start in range(self.stride, self.length - self.stride, self.stride)
+        ]
+        return "\n".join(rows)
+
+    def state(self) -> bytes:
+        """Energy of all octopuses with padding lanes, one byte each."""
+        return self.energy.to_bytes(self.length, "little")
+
+    def flashing_neighbors(self, flashing: int) -> int:
+        """Count flashing neighbors of each octopus, in its lane."""
+        row_shift = 8 * self.stride
+        in_row = flashing + (flashing << 8) + (flashing >> 8)
+        around = in_row + (in_row << row_shift) + (in_row >> row_shift)
+        return (around - flashing) & self.lanes
+
+    def make_step(self) -> int:
+        energy = self.energy + self.ones
+        flashed = 0
+        while True:
+            ready = (energy + self.flash_offset) >> 7 & self.ones
+            flashing = ready & ~flashed
+            if not flashing:
+                break
+            flashed |= flashing
+            energy += self.flashing_neighbors(flashing)
+
+        self.energy = energy & ~(flashed * 0xFF)
+        return popcount(flashed)
+
+    def make_n_steps(self, number: int) -> int:
+        total = 0
+        for _ in range(number):
+            total += self.make_step()
+
+        return total
+
+    def full_flash(self) -> int:
+        steps = 1
+        while self.make_step() != self.size():
+            steps += 1
+
+        return steps
+
+    def size(self) -> int:
+        return self.width * self.height
+
+
+TGrid = Union[OctopusGrid, PackedOctopusGrid]
+
+
+class FlashHistory:
+    """Steps of the grid with flash counts, noticing when grid state repeats.
+
+    Once a state repeats, the following steps repeat as well, so flash
+    counts of any later step are known without simulating it. States are
+    stored as 16-byte digests with the step they were seen at, together
+    with the flash totals of those steps. When that takes more than about
+    `max_bytes`, the stored steps are dropped and collected again from the
+    current step, so only cycles shorter than `max_states` are found and
+    totals of dropped steps are no longer available.
+    """
+
+    # digest, its dict entry and flash total of one stored step
+    STEP_BYTES = 160
+
+    def __init__(self, grid: TGrid, max_bytes: int = 64 * 2**20) -> None:
+        self.grid = grid
+        self.max_states = max(2, max_bytes // self.STEP_BYTES)
+        self.step_count = 0
+        self.states: Dict[bytes, int] = {self._digest(): 0}
+        self.first_kept = 0  # step of the first stored total
+        self.totals = array("q", [0])  # flashes up to step `first_kept + k`
+        self.cycle: Optional[Tuple[int, int]] = None  # first step and length
+        self.first_full_flash: Optional[int] = None
+
+    def _digest(self) -> bytes:
+        return hashlib.blake2b(self.grid.state(), digest_size=16).digest()
+
+    def steps(self) -> int:
+        return self.step_count
+
+    def step(self) -> int:
+        """Make next step of the grid, return its flash count."""
+        flashes = self.grid.make_step()
+        self.step_count += 1
+        if flashes == self.grid.size() and self.first_full_flash is None:
+            self.first_full_flash = self.step_count
+        if self.cycle is not None:
+            return flashes  # totals of the cycle are already known
+
+        self.totals.append(self.totals[-1] + flashes)
+        digest = self._digest()
+        if digest in self.states:
+            first_step = self.states[digest]
+            self.cycle = first_step, self.step_count - first_step
+            self.states.clear()
+        else:
+            if len(self.states) >= self.max_states:
+                self.states.clear()
+                self.totals = array("q", [self.totals[-1]])
+                self.first_kept = self.step_count
+            self.states[digest] = self.step_count
+
+        return flashes
+
+    def _total(self, step: int) -> int:
+        """Flashes in first `step` steps, the step may be after the last one."""
+        if step < self.first_kept:
+            raise ValueError(f"Step {step} is no longer kept")
+        if self.cycle is not None:
+            first_step, length = self.cycle
+            if step > first_step + length:
+                cycles, step_in_cycle = divmod(step - first_step, length)
+                before_cycle = self._total(first_step)
+                cycle_total = self._total(first_step + length) - before_cycle
+                return cycles * cycle_total + self._total(first_step + step_in_cycle)
+        return self.totals[step - self.first_kept]
+
+    def flashes(self, step: int) -> int:
+        """Flashes in the step, counted from 1."""
+        return self._total(step) - self._total(step - 1)
+
+    def make_n_steps(self, number: int) -> int:
+        """Flashes in first `number` steps, simulating only until a cycle."""
+        while self.step_count < number and self.cycle is None:
+            self.step()
+
+        return self._total(number)
+
+    def full_flash(self) -> int:
+        """First step when all octopuses flash, if there is any."""
+        while self.first_full_flash is None:
+            if self.cycle is not None:
+                # all steps of the cycle were already made
+                raise ValueError("Octopuses never flash at once")
+            self.step()
+
+        return self.first_full_flash
+
+
 def parse_input(file: str = "input.txt") -> List[List[int]]:
     lines = []
     with open(file, "r", encoding="utf-8") as fh:
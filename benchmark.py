@@ -0,0 +1,461 @@
+"""Benchmark daily solutions on seeded synthetic inputs of growing size.
+
+Every day has a generator producing input of roughly puzzle size multiplied
+by a scale factor, so e.g. scale 5000 gives 10^7 depth readings for day 1,
+scale 400 a 2000x2000 risk map for day 15 and scale 1000 10^5 bingo boards
+for day 4. Each case runs in a fresh process, measuring wall time of parsing
+and both parts and peak memory (Linux only). Results can be stored as JSON
+and compared with a previously stored baseline.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from run_all import find_solutions, load_module, SOLVERS
+
+TGenerator = Callable[[int, random.Random], Iterator[str]]
+TCase = Dict[str, Any]
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_SEED = 2021
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_TOLERANCE = 0.25
+# cases faster than this are too noisy to be compared with baseline
+MIN_COMPARED_TIME = 0.05
+# peak resident memory is read from status and reset by writing "5" to
+# clear_refs, see proc(5)
+PROC_STATUS = Path("/proc/self/status")
+PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def _side(base: int, scale: int) -> int:
+    """Side of a square grid with `scale` times more cells than base x base."""
+    return max(1, int(base * math.sqrt(scale)))
+
+
+def generate_day_01(scale: int, rng: random.Random) -> Iterator[str]:
+    depth = rng.randint(100, 200)
+    for _ in range(2000 * scale):
+        depth = max(0, depth + rng.randint(-10, 15))
+        yield str(depth)
+
+
+def generate_day_02(scale: int, rng: random.Random) -> Iterator[str]:
+    directions = ["forward", "down", "up"]
+    for _ in range(1000 * scale):
+        direction = rng.choices(directions, weights=[4, 4, 2])[0]
+        yield f"{direction} {rng.randint(1, 9)}"
+
+
+def _split_numbers(
+    count: int, prefix: int, bits: int, rng: random.Random
+) -> Iterator[int]:
+    """Yield `count` unique numbers, both bits present at every split.
+
+    Without that, filtering by the least common bit could remove all numbers.
+    """
+    if count == 1:
+        yield (prefix << bits) | rng.getrandbits(bits)
+        return
+    half = (count + rng.randint(0, 1)) // 2
+    yield from _split_numbers(half, prefix << 1, bits - 1, rng)
+    yield from _split_numbers(count - half, (prefix << 1) | 1, bits - 1, rng)
+
+
+def generate_day_03(scale: int, rng: random.Random) -> Iterator[str]:
+    count = 1000 * scale
+    width = max(12, count.bit_length() + 2)
+    numbers = list(_split_numbers(count, 0, width, rng))
+    rng.shuffle(numbers)
+    for number in numbers:
+        yield format(number, f"0{width}b")
+
+
+def generate_day_04(scale: int, rng: random.Random) -> Iterator[str]:
+    numbers = list(range(100))
+    rng.shuffle(numbers)
+    yield ",".join(map(str, numbers))
+    for _ in range(100 * scale):
+        yield ""
+        board = rng.sample(range(100), 25)
+        for row in range(5):
+            yield " ".join(f"{n:2}" for n in board[row * 5 : row * 5 + 5])
+
+
+def generate_day_05(scale: int, rng: random.Random) -> Iterator[str]:
+    side = _side(1000, scale)
+    for _ in range(500 * scale):
+        x1 = rng.randrange(side)
+        y1 = rng.randrange(side)
+        length = rng.randint(0, min(side - 1, 1000))
+        dx, dy = rng.choice([(1, 0), (0, 1), (1, 1), (1, -1)])
+        x2 = min(side - 1, x1 + dx * length)
+        y2 = min(side - 1, max(0, y1 + dy * length))
+        if dx and dy:  # keep diagonals at 45 degrees when clipped
+            length = min(abs(x2 - x1), abs(y2 - y1))
+            x2 = x1 + dx * length
+            y2 = y1 + dy * length
+        if rng.random() < 0.5:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        yield f"{x1},{y1} -> {x2},{y2}"
+
+
+def generate_day_06(scale: int, rng: random.Random) -> Iterator[str]:
+    yield ",".join(str(rng.randint(1, 5)) for _ in range(300 * scale))
+
+
+def generate_day_07(scale: int, rng: random.Random) -> Iterator[str]:
+    count = 1000 * scale
+    yield ",".join(str(int(rng.expovariate(1 / count))) for _ in range(count))
+
+
+def generate_day_08(scale: int, rng: random.Random) -> Iterator[str]:
+    digits = ["abcefg", "cf", "acdeg", "acdfg", "bcdf"]
+    digits += ["abdfg", "abdefg", "acf", "abcdefg", "abcdfg"]
+    for _ in range(200 * scale):
+        wires = list("abcdefg")
+        rng.shuffle(wires)
+        table = str.maketrans("abcdefg", "".join(wires))
+        scrambled = ["".join(rng.sample(d, len(d))).translate(table) for d in digits]
+        patterns = rng.sample(scrambled, len(scrambled))
+        output = [rng.choice(scrambled) for _ in range(4)]
+        yield f"{' '.join(patterns)} | {' '.join(output)}"
+
+
+def generate_day_09(scale: int, rng: random.Random) -> Iterator[str]:
+    side = _side(100, scale)
+    for _ in range(side):
+        # enough walls of 9 to split the map into many basins
+        row = (9 if rng.random() < 0.5 else rng.randint(0, 8) for _ in range(side))
+        yield "".join(map(str, row))
+
+
+def generate_day_10(scale: int, rng: random.Random) -> Iterator[str]:
+    pairs = ["()", "[]", "{}", "<>"]
+    for idx in range(100 * scale):
+        stack: List[str] = []
+        line: List[str] = []
+        for _ in range(rng.randint(50, 110)):
+            if stack and rng.random() < 0.45:
+                line.append(stack.pop())
+            else:
+                left, right = rng.choice(pairs)
+                line.append(left)
+                stack.append(right)
+        if idx % 2 and stack:  # corrupt every other line
+            wrong = [right for _, right in pairs if right != stack[-1]]
+            line.append(rng.choice(wrong))
+        yield "".join(line)
+
+
+def generate_day_11(scale: int, rng: random.Random) -> Iterator[str]:
+    # random grids with energy levels spread over 0-9 often never synchronize
+    side = _side(10, scale)
+    for _ in range(side):
+        yield "".join(str(rng.randint(5, 9)) for _ in range(side))
+
+
+def generate_day_12(scale: int, rng: random.Random) -> Iterator[str]:
+    # path count grows exponentially, so add only one small cave per doubling;
+    # big caves are never connected to each other (infinite paths otherwise)
+    small = [f"{c}{c}" for c in string.ascii_lowercase[: 4 + scale.bit_length()]]
+    big = ["AA", "BB", "CC"]
+    edges = set()
+    for cave in small:
+        edges.add((cave, rng.choice(big)))
+        edges.add((cave, rng.choice(small)))
+    for cave in rng.sample(small + big, 3):
+        edges.add(("start", cave))
+    for cave in rng.sample(small + big, 3):
+        edges.add((cave, "end"))
+    for left, right in sorted(edges):
+        if left != right:
+            yield f"{left}-{right}"
+
+
+def generate_day_13(scale: int, rng: random.Random) -> Iterator[str]:
+    size = 2 * _side(650, scale) + 1
+    folds = []
+    width = height = size
+    while width > 40:
+        width //= 2
+        folds.append(f"fold along x={width}")
+    while height > 6:
+        height //= 2
+        folds.append(f"fold along y={height}")
+    for _ in range(800 * scale):
+        yield f"{rng.randrange(size)},{rng.randrange(size)}"
+    yield ""
+    yield from folds
+
+
+def generate_day_14(scale: int, rng: random.Random) -> Iterator[str]:
+    elements = "BCFHKNOPSV"
+    yield "".join(rng.choice(elements) for _ in range(20 * scale))
+    yield ""
+    for left in elements:
+        for right in elements:
+            yield f"{left}{right} -> {rng.choice(elements)}"
+
+
+def generate_day_15(scale: int, rng: random.Random) -> Iterator[str]:
+    side = _side(100, scale)
+    for _ in range(side):
+        yield "".join(str(rng.randint(1, 9)) for _ in range(side))
+
+
+def _packet_bits(
+    budget: int, depth: int, max_depth: int, rng: random.Random, version: int
+) -> str:
+    """Encode random packet with about `budget` packets in its tree."""
+    header = format(version, "03b")
+    if budget <= 1 or depth >= max_depth:
+        value = format(rng.getrandbits(rng.randint(1, 32)), "b")
+        value = value.zfill(-(-len(value) // 4) * 4)
+        groups = [value[i : i + 4] for i in range(0, len(value), 4)]
+        body = "".join(
+            ("0" if i == len(groups) - 1 else "1") + group
+            for i, group in enumerate(groups)
+        )
+        return header + "100" + body
+
+    if rng.random() < 0.3:  # single child chains make the tree deep
+        type_id, budgets = rng.randint(0, 3), [budget - 1]
+    elif budget > 2 and rng.random() < 0.2:
+        type_id = rng.randint(5, 7)
+        half = rng.randint(1, budget - 2)
+        budgets = [half, budget - 1 - half]
+    else:
+        type_id = rng.randint(0, 3)
+        count = rng.randint(1, min(budget - 1, 8))
+        budgets = [(budget - 1) // count] * count
+
+    children = "".join(
+        _packet_bits(b, depth + 1, max_depth, rng, rng.randint(0, 7)) for b in budgets
+    )
+    if len(children) < 2**15 and rng.random() < 0.5:
+        length = "0" + format(len(children), "015b")
+    else:
+        length = "1" + format(len(budgets), "011b")
+
+    return header + format(type_id, "03b") + length + children
+
+
+def generate_day_16(scale: int, rng: random.Random) -> Iterator[str]:
+    # nesting costs stack frames when decoding, stay well below recursion limit
+    max_depth = min(300, 20 + 20 * scale.bit_length())
+    # version >= 4 so that the leading bit survives conversion from hex
+    bits = _packet_bits(60 * scale, 0, max_depth, rng, rng.randint(4, 7))
+    bits += "0" * (-len(bits) % 4)
+    yield format(int(bits, 2), f"0{len(bits) // 4}X")
+
+
+GENERATORS: Dict[int, TGenerator] = {
+    1: generate_day_01,
+    2: generate_day_02,
+    3: generate_day_03,
+    4: generate_day_04,
+    5: generate_day_05,
+    6: generate_day_06,
+    7: generate_day_07,
+    8: generate_day_08,
+    9: generate_day_09,
+    10: generate_day_10,
+    11: generate_day_11,
+    12: generate_day_12,
+    13: generate_day_13,
+    14: generate_day_14,
+    15: generate_day_15,
+    16: generate_day_16,
+}
+
+
+def write_input(day: int, scale: int, seed: int, file: str) -> int:
+    """Generate input for given day and scale, return its size in bytes."""
+    rng = random.Random(f"{seed}-{day}-{scale}")
+    size = 0
+    with open(file, "w", encoding="utf-8") as fh:
+        for line in GENERATORS[day](scale, rng):
+            size += fh.write(line + "\n")
+
+    return size
+
+
+def _memory_status_kib(field: str) -> int:
+    """Read memory figure of current process from /proc, in KiB."""
+    for line in PROC_STATUS.read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name == field:
+            return int(value.split()[0])
+    raise OSError(f"No {field} in {PROC_STATUS}")
+
+
+def _reset_peak_memory() -> Optional[int]:
+    """Reset peak resident memory to the current one and return it in KiB.
+
+    Returns None where the peak cannot be reset (outside of Linux).
+    """
+    try:
+        PROC_CLEAR_REFS.write_text("5")
+        return _memory_status_kib("VmRSS")
+    except OSError:
+        return None
+
+
+def measure(day: int, path: str, file: str) -> Tuple[List[float], Optional[int]]:
+    """Solve one day in current process.
+
+    Return times of parsing and each part and peak memory used while solving,
+    above memory used before (None if not measured).
+    """
+    module = load_module(Path(path))
+    parse_name, parts = SOLVERS[day]
+    memory_before = _reset_peak_memory()
+
+    start = time.perf_counter()
+    data = getattr(module, parse_name)(file)
+    times = [time.perf_counter() - start]
+    for part in parts:
+        start = time.perf_counter()
+        part(module, data)
+        times.append(time.perf_counter() - start)
+
+    if memory_before is None:
+        return times, None
+    return times, _memory_status_kib("VmHWM") - memory_before
+
+
+def run_case(
+    day: int, scale: int, seed: int, timeout: float, directory: str
+) -> TCase:
+    path = find_solutions()[day]
+    file = str(Path(directory) / f"day_{day:02}_scale_{scale}.txt")
+    case: TCase = {"day": day, "scale": scale}
+    case["input_bytes"] = write_input(day, scale, seed, file)
+
+    # fresh process for every case, so that peak memory is not shared
+    pool = multiprocessing.get_context("spawn").Pool(1)
+    try:
+        times, memory = pool.apply_async(measure, (day, str(path), file)).get(timeout)
+    except multiprocessing.TimeoutError:
+        case["timeout"] = True
+    except Exception as exc:  # pylint: disable=broad-except
+        case["error"] = repr(exc)
+    else:
+        case["parse"], *case["parts"] = times
+        case["total"] = sum(times)
+        case["peak_memory_kib"] = memory
+    finally:
+        pool.terminate()
+        pool.join()
+        Path(file).unlink()
+
+    return case
+
+
+def format_case(case: TCase) -> str:
+    prefix = f"Day {case['day']:02} x{case['scale']:<6} {case['input_bytes']:>12} B"
+    if case.get("timeout"):
+        return f"{prefix}  timeout"
+    if "error" in case:
+        return f"{prefix}  error: {case['error']}"
+    parts = " ".join(f"{t:9.3f}s" for t in case["parts"])
+    memory = case["peak_memory_kib"]
+    memory_text = "n/a" if memory is None else str(memory)
+    return (
+        f"{prefix} {case['total']:9.3f}s  (parse {case['parse']:.3f}s, parts {parts})"
+        f" {memory_text:>9} KiB"
+    )
+
+
+def compare(
+    cases: List[TCase], baseline: List[TCase], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Return descriptions of cases that got slower than baseline."""
+    previous = {(c["day"], c["scale"]): c for c in baseline}
+    regressions = []
+    for case in cases:
+        base = previous.get((case["day"], case["scale"]))
+        if base is None or "total" not in base:
+            continue
+        name = f"Day {case['day']:02} x{case['scale']}"
+        if "total" not in case:
+            regressions.append(f"{name}: not finished (was {base['total']:.3f}s)")
+            continue
+        if max(case["total"], base["total"]) < MIN_COMPARED_TIME:
+            continue
+        ratio = case["total"] / base["total"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{name}: {case['total']:.3f}s (was {base['total']:.3f}s, {ratio:.2f}x)"
+            )
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "days", nargs="*", type=int, help="days to benchmark (default: all)"
+    )
+    parser.add_argument(
+        "-s", "--scales", nargs="+", type=int, default=DEFAULT_SCALES
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="time limit of a single case in seconds",
+    )
+    parser.add_argument("-o", "--output", help="store results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="compare with this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed relative slowdown against baseline",
+    )
+    args = parser.parse_args(argv)
+
+    days = args.days or sorted(GENERATORS)
+    cases = []
+    with tempfile.TemporaryDirectory() as directory:
+        for day in days:
+            for scale in sorted(args.scales):
+                case = run_case(day, scale, args.seed, args.timeout, directory)
+                print(format_case(case), flush=True)
+                cases.append(case)
+                if "total" not in case:
+                    break  # larger scales would time out or fail as well
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"seed": args.seed, "cases": cases}, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)["cases"]
+        regressions = compare(cases, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Slower: {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
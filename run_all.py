@@ -0,0 +1,296 @@
+"""Run solutions of all days at once, spreading the days across processes."""
+
+import argparse
+import importlib.util
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+MODULE_PATTERN = re.compile(r"solution_day_(\d{2})\.py")
+
+TPart = Callable[[ModuleType, Any], Any]
+TSolver = Tuple[str, List[TPart]]
+TPartResult = Tuple[Any, float]
+TDayResult = Tuple[int, float, List[TPartResult]]
+
+
+def _count(iterable: Any) -> int:
+    count = 0
+    for _ in iterable:
+        count += 1
+
+    return count
+
+
+def _move_all(position: Any, moves: List[Any]) -> int:
+    for move in moves:
+        position.move(move)
+
+    return position.vertical * position.horizontal
+
+
+def _day_04(module: ModuleType, data: Any, order: int) -> int:
+    numbers, boards = data
+    return module.play(numbers, boards, order)
+
+
+def _day_07(module: ModuleType, crabs: List[int], func_name: str) -> int:
+    func = getattr(module, func_name)
+    return module.find_lowest_consumption(crabs, min(crabs), max(crabs), func)
+
+
+def _day_13_part_1(module: ModuleType, data: Any) -> int:
+    points, instructions = data
+    return len(module.fold(points, instructions[0]))
+
+
+def _day_13_part_2(module: ModuleType, data: Any) -> str:
+    points, instructions = data
+    folded = points
+    for instruction in instructions:
+        folded = module.fold(folded, instruction)
+
+    return module.paper_as_str(folded)
+
+
+def _day_14(module: ModuleType, data: Any, steps: int) -> int:
+    polymer = module.Polymer(*data)
+    polymer.make_n_steps(steps)
+    return polymer.most_common_least_common_diff()
+
+
+def _day_15(module: ModuleType, risk_map: List[List[int]], multiplier: int) -> int:
+    cave = module.Cave(risk_map)
+    cave.multiplier = multiplier
+    return cave.get_lowest_total_risk()
+
+
+def _day_16(module: ModuleType, bits: str, method: str) -> int:
+    packet = module.packet_factory(bits)
+    packet.make_children()
+    return getattr(packet, method)()
+
+
+# day -> (name of the parsing function, [part 1, part 2]),
+# each part is called with the imported module and the parsed input
+SOLVERS: Dict[int, TSolver] = {
+    1: (
+        "get_input",
+        [
+            lambda m, d: m.count_increases(d, 1),
+            lambda m, d: m.count_increases(d, 3),
+        ],
+    ),
+    2: (
+        "load_moves",
+        [
+            lambda m, d: _move_all(m.Position(), d),
+            lambda m, d: _move_all(m.AimedPosition(), d),
+        ],
+    ),
+    3: (
+        "get_lines",
+        [
+            lambda m, d: m.ReportAnalyzer(d).power_consumption(),
+            lambda m, d: m.ReportAnalyzer(d).life_support_rating(),
+        ],
+    ),
+    4: (
+        "parse_input",
+        [lambda m, d: _day_04(m, d, 1), lambda m, d: _day_04(m, d, -1)],
+    ),
+    5: (
+        "parse_input",
+        [
+            lambda m, d: m.get_vent_count(d),
+            lambda m, d: m.get_vent_count(d, skip_diagonals=False),
+        ],
+    ),
+    6: (
+        "parse_input",
+        [lambda m, d: m.get_fish_count(d, 80), lambda m, d: m.get_fish_count(d, 256)],
+    ),
+    7: (
+        "parse_input",
+        [
+            lambda m, d: _day_07(m, d, "fuel_to_point_1"),
+            lambda m, d: _day_07(m, d, "fuel_to_point_2"),
+        ],
+    ),
+    8: (
+        "parse_input",
+        [lambda m, d: m.count_easy_digits(d), lambda m, d: m.get_sum(d)],
+    ),
+    9: (
+        "parse_input",
+        [
+            lambda m, d: m.HeightMap(d).total_risk_level(),
+            lambda m, d: m.HeightMap(d).largest_basins_product(),
+        ],
+    ),
+    10: (
+        "parse_input",
+        [
+            lambda m, d: m.score_corrupted_lines(d),
+            lambda m, d: m.score_incomplete_lines(d),
+        ],
+    ),
+    11: (
+        "parse_input",
+        [
+            lambda m, d: m.OctopusGrid(d).make_n_steps(100),
+            lambda m, d: m.OctopusGrid(d).full_flash(),
+        ],
+    ),
+    12: (
+        "parse_input",
+        [
+            lambda m, d: _count(m.PathFinder(d).iter_paths()),
+            lambda m, d: _count(m.ReviewedPathFinder(d).iter_paths()),
+        ],
+    ),
+    13: ("parse_input", [_day_13_part_1, _day_13_part_2]),
+    14: (
+        "parse_input",
+        [lambda m, d: _day_14(m, d, 10), lambda m, d: _day_14(m, d, 40)],
+    ),
+    15: (
+        "parse_input",
+        [lambda m, d: _day_15(m, d, 1), lambda m, d: _day_15(m, d, 5)],
+    ),
+    16: (
+        "parse_input",
+        [
+            lambda m, d: _day_16(m, d, "version_sum"),
+            lambda m, d: _day_16(m, d, "get_value"),
+        ],
+    ),
+}
+
+
+def find_solutions(root: Path = ROOT) -> Dict[int, Path]:
+    """Return mapping of day numbers to their solution modules."""
+    solutions = {}
+    for path in sorted(root.glob("*/solution_day_*.py")):
+        match = MODULE_PATTERN.fullmatch(path.name)
+        if match is not None:
+            solutions[int(match.group(1))] = path
+
+    return solutions
+
+
+def load_module(path: Path) -> ModuleType:
+    """Import solution module from its file path.
+
+    The module is registered in `sys.modules` under its file name (unique
+    for each day), so that dataclasses and pickling can find it.
+    """
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot import: {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)  # type: ignore
+    except BaseException:
+        del sys.modules[spec.name]
+        raise
+
+    return module
+
+
+def solve_day(day: int, path: Path, input_name: str) -> TDayResult:
+    """Parse input of one day and solve both parts, timing each step.
+
+    Returns day number, parsing time and (solution, time) for each part.
+    """
+    module = load_module(path)
+    parse_name, parts = SOLVERS[day]
+    parse = getattr(module, parse_name)
+
+    start = time.perf_counter()
+    data = parse(str(path.parent / input_name))
+    parse_time = time.perf_counter() - start
+
+    results = []
+    for part in parts:
+        start = time.perf_counter()
+        solution = part(module, data)
+        results.append((solution, time.perf_counter() - start))
+
+    return day, parse_time, results
+
+
+def run(
+    days: List[int], input_name: str = "input.txt", workers: Optional[int] = None
+) -> List[TDayResult]:
+    """Solve given days in a process pool, results are sorted by day.
+
+    Days that fail are reported to stderr and left out of the results.
+    """
+    solutions = find_solutions()
+    unknown = [day for day in days if day not in solutions or day not in SOLVERS]
+    if unknown:
+        raise ValueError(f"Unknown days: {unknown}")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(solve_day, day, solutions[day], input_name): day
+            for day in days
+        }
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                print(f"Day {futures[future]:02} failed: {exc!r}", file=sys.stderr)
+
+    return sorted(results, key=lambda result: result[0])
+
+
+def format_result(result: TDayResult) -> str:
+    day, parse_time, parts = result
+    total = parse_time + sum(part_time for _, part_time in parts)
+    lines = [f"Day {day:02}: {total:9.3f}s (parsing {parse_time:.3f}s)"]
+    for idx, (solution, part_time) in enumerate(parts):
+        text = str(solution)
+        if "\n" in text:
+            text = "\n" + text
+        lines.append(f"  Part {idx + 1}: {part_time:9.3f}s  {text}")
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "days", nargs="*", type=int, help="days to solve (default: all)"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="input.txt",
+        help="name of the input file in each day directory (default: input.txt)",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None, help="number of processes"
+    )
+    args = parser.parse_args(argv)
+
+    days = args.days or sorted(set(find_solutions()) & set(SOLVERS))
+    start = time.perf_counter()
+    results = run(days, args.input, args.workers)
+    wall_time = time.perf_counter() - start
+
+    for result in results:
+        print(format_result(result))
+    print(f"Wall time: {wall_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])